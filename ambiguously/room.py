@@ -8,6 +8,21 @@ from typing import List, Optional
 class Room:
     """A room identified by paths, label, and adjacency fingerprint"""
 
+    # Slotted: exploration holds many candidate rooms at once, so skip the
+    # per-instance __dict__
+    __slots__ = (
+        "label",
+        "paths",
+        "door_labels",
+        "disambiguation_id",
+        "parent",
+        "parent_door",
+        "path_to_root",
+        "path_from_root",
+        "is_done",
+        "door_rooms",
+    )
+
     def __init__(self, label: Optional[int] = None, parent=None, parent_door: Optional[int] = None):
         self.label = label  # Room label (0, 1, 2, 3)
         self.paths = []  # List of paths used to reach this room
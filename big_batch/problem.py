@@ -18,9 +18,13 @@ class Problem:
         self,
         room_count: int,
         user_id: str = "awwaiid@thelackthereof.org zFPVkfKRKAgDUdmVr2Oi1A",
+        batch_size: int = None,
+        verbose: bool = False,
     ):
         self.room_count = room_count
         self.user_id = user_id
+        self.batch_size = batch_size  # Max plans per /explore request (None = unlimited)
+        self.verbose = verbose  # Print per-observation debug output
         
         # Initialize components
         self.observations = []  # Raw API observations
@@ -67,7 +71,9 @@ class Problem:
 
     def process_observation(self, path: List[int], rooms: List[int]):
         """Process a single observation to update room knowledge"""
-        print(f"Processing: path={path}, rooms={rooms}")
+        verbose = self.verbose
+        if verbose:
+            print(f"Processing: path={path}, rooms={rooms}")
 
         if not rooms:
             return
@@ -76,9 +82,11 @@ class Problem:
         starting_label = rooms[0]
 
         # Find or create room for starting position
-        print(f"  Looking for starting room with path=[] and label={starting_label}")
+        if verbose:
+            print(f"  Looking for starting room with path=[] and label={starting_label}")
         starting_room = self.room_manager.find_or_create_room_for_path([], starting_label)
-        print(f"  Using starting room: {starting_room}")
+        if verbose:
+            print(f"  Using starting room: {starting_room}")
 
         # Process each step in the path
         current_room = starting_room
@@ -87,20 +95,23 @@ class Problem:
                 destination_label = rooms[i + 1]
 
                 # Record that this door leads to a room with this label
-                print(
-                    f"  Room {current_room.label} door {door} -> label {destination_label}"
-                )
+                if verbose:
+                    print(
+                        f"  Room {current_room.label} door {door} -> label {destination_label}"
+                    )
                 current_room.set_door_label(door, destination_label)
 
                 # Find or create the destination room
                 path_to_destination = path[: i + 1]
-                print(
-                    f"  Looking for destination room with path={path_to_destination} and label={destination_label}"
-                )
+                if verbose:
+                    print(
+                        f"  Looking for destination room with path={path_to_destination} and label={destination_label}"
+                    )
                 destination_room = self.room_manager.find_or_create_room_for_path(
                     path_to_destination, destination_label
                 )
-                print(f"  Using destination room: {destination_room}")
+                if verbose:
+                    print(f"  Using destination room: {destination_room}")
 
                 current_room = destination_room
 
@@ -273,11 +284,18 @@ class Problem:
             print("No pending explorations!")
             return False
         
+        if self.batch_size is not None and len(pending_paths) > self.batch_size:
+            print(
+                f"BATCH: Capping {len(pending_paths)} pending explorations at batch size {self.batch_size}"
+            )
+            pending_paths = pending_paths[: self.batch_size]
+
         print(f"BATCH: Found {len(pending_paths)} pending explorations to send in one batch")
-        for i, path in enumerate(pending_paths[:10]):  # Show first 10 for brevity
-            print(f"  {i+1}: {path}")
-        if len(pending_paths) > 10:
-            print(f"  ... and {len(pending_paths) - 10} more")
+        if self.verbose:
+            for i, path in enumerate(pending_paths[:10]):  # Show first 10 for brevity
+                print(f"  {i+1}: {path}")
+            if len(pending_paths) > 10:
+                print(f"  ... and {len(pending_paths) - 10} more")
         
         # Send all at once
         self.explore(pending_paths)
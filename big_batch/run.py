@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
 """
 Run script for the big-batch approach
-Usage: python big-batch/run.py <problem_name> <room_count>
-Example: python big-batch/run.py secundus 12
+Usage: python big-batch/run.py <problem_name> <room_count> [--batch-size N] [--verbose]
+Example: python big-batch/run.py secundus 12 --batch-size 50
 """
 
+import argparse
 import sys
 import os
 
@@ -15,34 +16,46 @@ from big_batch.problem import Problem
 
 
 def main():
-    if len(sys.argv) != 3:
-        print("Usage: python big-batch/run.py <problem_name> <room_count>")
-        print("Example: python big-batch/run.py secundus 12")
-        sys.exit(1)
-    
-    problem_name = sys.argv[1]
-    room_count = int(sys.argv[2])
-    
-    print(f"=== Running BIG-BATCH approach on {problem_name} with {room_count} rooms ===")
-    
+    parser = argparse.ArgumentParser(
+        description="Run the big-batch approach on a problem"
+    )
+    parser.add_argument("problem", help="problem name, e.g. secundus")
+    parser.add_argument("room_count", type=int, help="number of rooms in the problem")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="cap explore batches at N plans per request (default: send everything)",
+    )
+    parser.add_argument("--verbose", action="store_true", help="extra debug output")
+    args = parser.parse_args()
+
+    print(
+        f"=== Running BIG-BATCH approach on {args.problem} with {args.room_count} rooms ==="
+    )
+
     # Create problem instance
-    p = Problem(room_count=room_count)
-    
+    p = Problem(
+        room_count=args.room_count,
+        batch_size=args.batch_size,
+        verbose=args.verbose,
+    )
+
     # Select the problem
-    p.select_problem(problem_name)
-    
+    p.select_problem(args.problem)
+
     # Bootstrap to discover starting room
-    p.bootstrap(problem_name)
-    
+    p.bootstrap(args.problem)
+
     # Explore until complete using BIG BATCHES
     p.explore_until_complete_batched()
-    
+
     # Generate solution
     p.generate_solution()
-    
+
     print(f"\n🎉 Completed! Solution written to solution.json")
     print(f"To submit: python bin/guess solution.json")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -2,6 +2,7 @@
 Connection-based room exploration data structures
 """
 
+from array import array
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple, Set
 
@@ -49,6 +50,48 @@ class Connection:
         )
 
 
+class ObservationStore:
+    """Column-oriented store of raw exploration observations.
+
+    Int fields live in compact array("i") columns instead of one dict per
+    observation, cutting per-record memory and attribute hashing for large
+    runs. Iteration still yields dict records so JSON save/load and existing
+    callers keep working.
+    """
+
+    def __init__(self):
+        self.from_room_id = array("i")
+        self.from_room_label = array("i")
+        self.door = array("i")
+        self.paths: List[List[int]] = []
+        self.rooms: List[List[int]] = []
+
+    def append(self, record: Dict):
+        """Append one observation record (dict-shaped, as produced by explore)"""
+        self.from_room_id.append(record["from_room_id"])
+        self.from_room_label.append(record["from_room_label"])
+        self.door.append(record["door"])
+        self.paths.append(record["path"])
+        self.rooms.append(record["rooms"])
+
+    def __len__(self):
+        return len(self.door)
+
+    def __iter__(self):
+        for i in range(len(self.door)):
+            yield {
+                "from_room_id": self.from_room_id[i],
+                "from_room_label": self.from_room_label[i],
+                "door": self.door[i],
+                "path": self.paths[i],
+                "rooms": self.rooms[i],
+            }
+
+    def to_list(self) -> List[Dict]:
+        """Materialize as a plain list of dicts (for JSON serialization)"""
+        return list(self)
+
+
 class ConnectionTable:
     """Table of all room-to-room door connections"""
 
@@ -65,6 +108,11 @@ class ConnectionTable:
             int, List[Connection]
         ] = {}  # room_id -> all connections from that room
 
+        self.by_label: Dict[int, int] = {}  # room_label -> room_id
+
+        # Specialized counter built by compile_specialized()
+        self._fast_count_mergeable = None
+
     def add_connection(
         self,
         from_room_id: int,
@@ -89,6 +137,8 @@ class ConnectionTable:
                 existing.to_door = to_door
             if confirmed:
                 existing.confirmed = True
+            if to_room_id is not None and to_room_label is not None:
+                self.by_label.setdefault(to_room_label, to_room_id)
             return existing
 
         # Create new connection
@@ -119,6 +169,11 @@ class ConnectionTable:
             self.by_room_id[connection.from_room_id] = []
         self.by_room_id[connection.from_room_id].append(connection)
 
+        # Index by label
+        self.by_label.setdefault(connection.from_room_label, connection.from_room_id)
+        if connection.to_room_id is not None and connection.to_room_label is not None:
+            self.by_label.setdefault(connection.to_room_label, connection.to_room_id)
+
     def get_connection(self, from_room_id: int, from_door: int) -> Optional[Connection]:
         """Get connection from specific room and door"""
         connections = self.by_from.get((from_room_id, from_door), [])
@@ -148,6 +203,42 @@ class ConnectionTable:
 
         return merges
 
+    def compile_specialized(self):
+        """Compile a mergeable-pair counter specialized to this problem instance.
+
+        Once a problem is selected, max_rooms and the door count are fixed
+        constants, so we generate the counting function at problem-start time
+        with those values inlined as literals. The generated function buckets
+        complete connections by (from_label, to_label) into a flat array and
+        sums pairs per bucket - the same count find_mergeable_connections()
+        gives, but without the O(N^2) pairwise matches_pattern scan.
+        """
+        # Room labels are 2-bit (0-3), so 16 (from, to) buckets cover all pairs
+        source = (
+            f"def _fast_count_mergeable(connections, _ROOMS={self.max_rooms}, _DOORS=6):\n"
+            "    counts = array('Q', bytes(8 * 16))\n"
+            "    for conn in connections:\n"
+            "        to_label = conn.to_room_label\n"
+            "        if (\n"
+            "            to_label is None\n"
+            "            or conn.to_room_id is None\n"
+            "            or conn.to_door is None\n"
+            "        ):\n"
+            "            continue\n"
+            "        counts[(conn.from_room_label << 2) | to_label] += 1\n"
+            "    return sum(k * (k - 1) // 2 for k in counts)\n"
+        )
+        namespace = {"array": array}
+        exec(source, namespace)
+        self._fast_count_mergeable = namespace["_fast_count_mergeable"]
+        return self._fast_count_mergeable
+
+    def count_mergeable_connections(self) -> int:
+        """Count mergeable pairs, using the specialized counter if compiled"""
+        if self._fast_count_mergeable is not None:
+            return self._fast_count_mergeable(self.connections)
+        return len(self.find_mergeable_connections())
+
     def get_next_room_id(self) -> int:
         """Get next available room ID"""
         room_id = self.next_room_id
@@ -160,7 +251,7 @@ class ConnectionTable:
         complete = len([c for c in self.connections if c.is_complete()])
         confirmed = len([c for c in self.connections if c.confirmed])
         unique_rooms = len(set(c.from_room_id for c in self.connections))
-        mergeable = len(self.find_mergeable_connections())
+        mergeable = self.count_mergeable_connections()
 
         return {
             "total_connections": total,
@@ -2,15 +2,29 @@
 Connection-based problem solver
 """
 
+import gzip
+import hashlib
 import json
+import os
+import shelve
 import requests
+
+try:
+    import orjson  # Optional: much faster C encoder/decoder
+except ImportError:
+    orjson = None
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Tuple
-from .connection_data import ConnectionTable, Connection
+from .connection_data import ConnectionTable, Connection, ObservationStore
 
 
 class ConnectionProblem:
     """Problem solver focused on building a table of room-door connections"""
 
+    # Single-door plan strings never change; build them once
+    _PLAN_STRINGS = [str(d) for d in range(6)]
+
     def __init__(
         self,
         room_count: int,
@@ -19,72 +33,209 @@ class ConnectionProblem:
         self.room_count = room_count
         self.user_id = user_id
         self.base_url = "https://31pwr5t6ij.execute-api.eu-west-2.amazonaws.com"
+        self.debug = False  # Gate the per-iteration DEBUG output
+
+        # Reuse one keep-alive connection (and its TLS handshake) across calls
+        self._session = requests.Session()
+        self._session.headers.update({"Content-Type": "application/json"})
 
         self.table = ConnectionTable(room_count)
+        self.table.compile_specialized()
         self.starting_room_id = 0  # Always start in room 0
         self.starting_room_label = None  # Will be discovered
 
-        self.observations = []  # Store raw API results
+        # Door-string path from room 0 to each known room, used as the plan
+        # prefix when exploring that room's doors
+        self.room_paths = {self.starting_room_id: ""}
+
+
+        # Incrementally-maintained exploration state so the per-iteration
+        # "what needs exploring" queries don't rescan every connection
+        self._known_rooms = set()  # (room_id, room_label)
+        self._door_mask = {}  # room_id -> bitmask of from_doors mapped (0x3F = all 6)
+        self._explored_from = set()  # (room_id, room_label) we've explored FROM
+
+        # BFS frontier of rooms to explore next, pushed as they're discovered
+        self._frontier = deque()
+
+        # Disk-backed cache of /explore responses: for a selected problem the
+        # server is deterministic, so replays skip the network entirely
+        self._explore_cache_path = ".explore_cache"
+        self._cache_problem = None
+
+        self.observations = ObservationStore()  # Store raw API results (SoA columns)
 
     def select_problem(self, problem_name: str):
         """Select a problem using the API"""
         print(f"Selecting problem {problem_name}")
+        self._cache_problem = problem_name  # Namespace cached explores by problem
 
         data = {"id": self.user_id, "problemName": problem_name}
-        response = requests.post(
-            f"{self.base_url}/select",
-            headers={"Content-Type": "application/json"},
-            json=data,
-        )
+        response = self._session.post(f"{self.base_url}/select", json=data)
 
         print(f"Status: {response.status_code}")
         print(response.text)
         return response
 
+    def _post_explore(self, plan_strings: List[str]) -> Optional[dict]:
+        """POST plans to /explore, consulting the disk-backed response cache.
+
+        Responses are deterministic for a given (problem, plans), so cached
+        results are replayed without a network round-trip. Caching is skipped
+        until a problem has been selected.
+        """
+        if self._cache_problem is not None:
+            payload = json.dumps(
+                {"p": self._cache_problem, "plans": plan_strings}, sort_keys=True
+            )
+            key = hashlib.sha1(payload.encode()).hexdigest()
+            with shelve.open(self._explore_cache_path) as cache:
+                if key in cache:
+                    print(f"Cache hit for {len(plan_strings)} plans")
+                    return cache[key]
+        else:
+            key = None
+
+        data = {"id": self.user_id, "plans": plan_strings}
+        response = self._session.post(f"{self.base_url}/explore", json=data)
+
+        print(f"Status: {response.status_code}")
+        if response.status_code != 200:
+            print(response.text)
+            return None
+
+        try:
+            result = response.json()
+        except json.JSONDecodeError:
+            print("Failed to parse response JSON")
+            return None
+
+        if key is not None:
+            with shelve.open(self._explore_cache_path) as cache:
+                cache[key] = result
+        return result
+
     def explore_from_room(
         self, room_id: int, room_label: int
     ) -> List[Tuple[int, List[int]]]:
         """Explore all doors from a specific room"""
         print(f"Exploring all doors from Room {room_id} (label {room_label})")
 
-        # Create plans for all 6 doors from this room
-        plans = [[door] for door in range(6)]
-
-        # Convert to API format
-        plan_strings = [str(door) for door in range(6)]
+        plan_strings = self._PLAN_STRINGS
         print(f"Exploring doors: {', '.join(plan_strings)}")
 
-        data = {"id": self.user_id, "plans": plan_strings}
-        response = requests.post(
-            f"{self.base_url}/explore",
-            headers={"Content-Type": "application/json"},
-            json=data,
-        )
-
-        print(f"Status: {response.status_code}")
-        print(response.text)
+        result = self._post_explore(plan_strings)
 
         results = []
-        if response.status_code == 200:
+        if result and "results" in result:
+            lines = []
+            for door, rooms_result in enumerate(result["results"]):
+                self.observations.append(
+                    {
+                        "from_room_id": room_id,
+                        "from_room_label": room_label,
+                        "door": door,
+                        "path": [door],
+                        "rooms": rooms_result,
+                    }
+                )
+                results.append((door, rooms_result))
+                lines.append(f"  Door {door}: {rooms_result}")
+            # One write instead of a syscall per door
+            print("\n".join(lines))
+
+        return results
+
+    def explore_rooms_batched(
+        self, rooms: List[Tuple[int, int]]
+    ) -> List[Tuple[int, List[int]]]:
+        """Explore all 6 doors of several rooms in a single /explore request.
+
+        Each plan is a multi-hop "walk-then-door" string: the stored door
+        path from room 0 to the target room followed by the door to probe,
+        so one request covers the whole frontier regardless of depth.
+        """
+        plans = []
+        for room_id, room_label in rooms:
+            prefix = self.room_paths.get(room_id, "")
+            plans.extend(f"{prefix}{door}" for door in range(6))
+
+        print(f"Batch exploring {len(rooms)} rooms ({len(plans)} plans)")
+
+        result = self._post_explore(plans)
+
+        all_results = []
+        if result and "results" in result:
+            # Results come back in plan order: demultiplex into groups of 6,
+            # one group per room
+            for i, (room_id, room_label) in enumerate(rooms):
+                group = result["results"][i * 6 : (i + 1) * 6]
+                room_results = self._record_room_results(room_id, room_label, group)
+                all_results.extend(room_results)
+
+        return all_results
+
+    def _record_room_results(
+        self, room_id: int, room_label: int, group: List[List[int]]
+    ) -> List[Tuple[int, List[int]]]:
+        """Record one room's 6-door results as observations and connections"""
+        prefix = self.room_paths.get(room_id, "")
+        room_results = []
+        for door, rooms_result in enumerate(group):
+            self.observations.append(
+                {
+                    "from_room_id": room_id,
+                    "from_room_label": room_label,
+                    "door": door,
+                    "path": [int(c) for c in prefix] + [door],
+                    "rooms": rooms_result,
+                }
+            )
+            room_results.append((door, rooms_result))
+        self.process_exploration_results(room_id, room_label, room_results)
+        return room_results
+
+    def explore_rooms_concurrent(
+        self, rooms: List[Tuple[int, int]], max_workers: int = 8
+    ) -> List[Tuple[int, List[int]]]:
+        """Explore several rooms with overlapping in-flight requests.
+
+        Alternative to explore_rooms_batched when the server handles many
+        small requests better than one huge plan list: each room's 6-door
+        request is posted from a worker thread so the network round-trips
+        overlap, then results are processed serially on this thread.
+        """
+
+        def post_room(room):
+            room_id, room_label = room
+            prefix = self.room_paths.get(room_id, "")
+            plans = [f"{prefix}{door}" for door in range(6)]
+            data = {"id": self.user_id, "plans": plans}
+            response = self._session.post(f"{self.base_url}/explore", json=data)
+            return room, response
+
+        print(f"Concurrently exploring {len(rooms)} rooms (max {max_workers} in flight)")
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            responses = list(pool.map(post_room, rooms))
+
+        all_results = []
+        for (room_id, room_label), response in responses:
+            if response.status_code != 200:
+                print(f"Room {room_id}: status {response.status_code}")
+                continue
             try:
                 result = response.json()
-                if "results" in result:
-                    for door, rooms_result in enumerate(result["results"]):
-                        self.observations.append(
-                            {
-                                "from_room_id": room_id,
-                                "from_room_label": room_label,
-                                "door": door,
-                                "path": [door],
-                                "rooms": rooms_result,
-                            }
-                        )
-                        results.append((door, rooms_result))
-                        print(f"  Door {door}: {rooms_result}")
             except json.JSONDecodeError:
-                print("Failed to parse response JSON")
+                print(f"Room {room_id}: failed to parse response JSON")
+                continue
+            if "results" in result:
+                room_results = self._record_room_results(
+                    room_id, room_label, result["results"][:6]
+                )
+                all_results.extend(room_results)
 
-        return results
+        return all_results
 
     def process_exploration_results(
         self,
@@ -94,13 +245,24 @@ class ConnectionProblem:
     ):
         """Process results from exploring all doors of a room"""
 
+        self._known_rooms.add((from_room_id, from_room_label))
+        self._explored_from.add((from_room_id, from_room_label))
+
+
         for door, rooms_result in results:
-            if len(rooms_result) >= 2:  # Should be [from_room_label, to_room_label]
-                to_room_label = rooms_result[1]  # Second room in the path
+            if len(rooms_result) >= 2:  # Should end [..., from_room_label, to_room_label]
+                to_room_label = rooms_result[-1]  # Final room in the path
 
                 # Try to find existing room with this label to connect to
                 to_room_id = self._find_or_create_room_with_label(to_room_label)
 
+                # Remember how to reach the destination room for later batches
+                # and queue newly discovered rooms for BFS exploration
+                if to_room_id not in self.room_paths:
+                    prefix = self.room_paths.get(from_room_id, "")
+                    self.room_paths[to_room_id] = f"{prefix}{door}"
+                    self._frontier.append((to_room_id, to_room_label))
+
                 # Add connection (we don't know the to_door yet)
                 connection = self.table.add_connection(
                     from_room_id=from_room_id,
@@ -112,19 +274,20 @@ class ConnectionProblem:
                     confirmed=True,  # We directly traversed this
                 )
 
+                self._door_mask[from_room_id] = self._door_mask.get(
+                    from_room_id, 0
+                ) | (1 << door)
+                self._known_rooms.add((to_room_id, to_room_label))
+
                 print(f"  Added: {connection}")
 
     def _find_or_create_room_with_label(self, label: int) -> int:
         """Find existing room with given label, or create new one"""
-        # Look for existing room with this label
-        for connection in self.table.connections:
-            if connection.from_room_label == label:
-                return connection.from_room_id
-            if connection.to_room_label == label and connection.to_room_id is not None:
-                return connection.to_room_id
-
-        # Create new room
-        return self.table.get_next_room_id()
+        room_id = self.table.by_label.get(label)
+        if room_id is None:
+            room_id = self.table.get_next_room_id()
+            self.table.by_label[label] = room_id
+        return room_id
 
     def bootstrap(self, problem_name: str):
         """Bootstrap the exploration by starting from room 0"""
@@ -145,6 +308,11 @@ class ConnectionProblem:
                 self.starting_room_label = actual_starting_label
                 print(f"Starting room label discovered: {actual_starting_label}")
 
+                # Seed the BFS frontier at the starting room
+                self._frontier.append(
+                    (self.starting_room_id, self.starting_room_label)
+                )
+
                 # Re-process results with correct starting label
                 self.process_exploration_results(
                     from_room_id=self.starting_room_id,
@@ -152,7 +320,7 @@ class ConnectionProblem:
                     results=initial_results,
                 )
 
-    def explore_breadth_first(self, max_iterations: int = 10):
+    def explore_breadth_first(self, max_iterations: int = 10, concurrent: bool = False):
         """Explore rooms breadth-first, focusing on rooms with incomplete connections"""
         print(f"\n=== Breadth-First Exploration (max {max_iterations} iterations) ===")
 
@@ -161,8 +329,16 @@ class ConnectionProblem:
             iteration += 1
             print(f"\nIteration {iteration}:")
 
-            # Find rooms that need more exploration
-            rooms_to_explore = self._find_rooms_needing_exploration()
+            # Drain the frontier queue: O(1) pops of rooms discovered since
+            # the last iteration, skipping any already fully mapped
+            rooms_to_explore = []
+            seen = set()
+            while self._frontier:
+                room_id, room_label = self._frontier.popleft()
+                if room_id in seen or self._door_mask.get(room_id, 0) == 0x3F:
+                    continue
+                seen.add(room_id)
+                rooms_to_explore.append((room_id, room_label))
 
             # If no rooms need basic exploration, check for reverse mapping opportunities
             if not rooms_to_explore:
@@ -185,67 +361,35 @@ class ConnectionProblem:
                         print("All connections complete!")
                         break
 
-            # Explore the first room that needs it
-            room_id, room_label = rooms_to_explore[0]
-            print(f"Exploring Room {room_id} (label {room_label})...")
-
-            results = self.explore_from_room(room_id, room_label)
-            self.process_exploration_results(room_id, room_label, results)
+            # Explore every room that needs it in one combined request,
+            # collapsing N sequential round-trips into 1 per iteration
+            print(f"Exploring {len(rooms_to_explore)} rooms in one batch...")
+            if concurrent:
+                self.explore_rooms_concurrent(rooms_to_explore)
+            else:
+                self.explore_rooms_batched(rooms_to_explore)
 
             # Show current state
             self.print_progress()
 
     def _find_rooms_needing_exploration(self) -> List[Tuple[int, int]]:
         """Find rooms that have incomplete door connections"""
-        rooms_needing_exploration = []
-
-        # Get all unique rooms we know about
-        known_rooms = set()
-        for conn in self.table.connections:
-            known_rooms.add((conn.from_room_id, conn.from_room_label))
-            if conn.to_room_id is not None and conn.to_room_label is not None:
-                known_rooms.add((conn.to_room_id, conn.to_room_label))
-
-        print(f"  DEBUG: Found {len(known_rooms)} known rooms: {sorted(known_rooms)}")
-
-        # Check which rooms have incomplete door mappings
-        for room_id, room_label in known_rooms:
-            connections_from_room = self.table.get_room_connections(room_id)
-
-            # Check if we have all 6 doors mapped from this room
-            mapped_doors = set(conn.from_door for conn in connections_from_room)
+        rooms_needing_exploration = [
+            (room_id, room_label)
+            for room_id, room_label in self._known_rooms
+            if self._door_mask.get(room_id, 0) != 0x3F
+        ]
 
+        if self.debug:
             print(
-                f"  DEBUG: Room {room_id}(L{room_label}) has {len(mapped_doors)}/6 doors mapped: {sorted(mapped_doors)}"
+                f"  DEBUG: Found {len(self._known_rooms)} known rooms: {sorted(self._known_rooms)}\n"
+                f"  DEBUG: {len(rooms_needing_exploration)} rooms need exploration: {rooms_needing_exploration}"
             )
-
-            if len(mapped_doors) < 6:
-                rooms_needing_exploration.append((room_id, room_label))
-
-        print(
-            f"  DEBUG: {len(rooms_needing_exploration)} rooms need exploration: {rooms_needing_exploration}"
-        )
         return rooms_needing_exploration
 
     def _find_rooms_for_reverse_mapping(self) -> List[Tuple[int, int]]:
         """Find rooms that we haven't explored from yet, but know exist as destinations"""
-        rooms_for_reverse_mapping = []
-
-        # Get all unique rooms we know about
-        all_known_rooms = set()
-        explored_from_rooms = set()  # Rooms we've explored FROM
-
-        for conn in self.table.connections:
-            all_known_rooms.add((conn.from_room_id, conn.from_room_label))
-            explored_from_rooms.add((conn.from_room_id, conn.from_room_label))
-
-            if conn.to_room_id is not None and conn.to_room_label is not None:
-                all_known_rooms.add((conn.to_room_id, conn.to_room_label))
-
-        # Find rooms we know about but haven't explored from
-        unexplored_rooms = all_known_rooms - explored_from_rooms
-
-        return list(unexplored_rooms)
+        return list(self._known_rooms - self._explored_from)
 
     def analyze_connections(self):
         """Analyze the connection table for patterns and merges"""
@@ -288,25 +432,20 @@ class ConnectionProblem:
         """Debug current exploration state"""
         print("\n=== Debug Exploration State ===")
 
-        # Show all rooms and their door completion
-        known_rooms = set()
-        for conn in self.table.connections:
-            known_rooms.add((conn.from_room_id, conn.from_room_label))
-            if conn.to_room_id is not None and conn.to_room_label is not None:
-                known_rooms.add((conn.to_room_id, conn.to_room_label))
-
+        # Show all rooms and their door completion, sorting the cached room
+        # set once; mapped doors come straight out of the bitmask already in
+        # ascending order, so no per-room set build or sort
+        known_rooms = sorted(self._known_rooms)
         print(f"All known rooms ({len(known_rooms)}):")
-        for room_id, room_label in sorted(known_rooms):
-            connections_from_room = self.table.get_room_connections(room_id)
-            mapped_doors = set(conn.from_door for conn in connections_from_room)
+        for room_id, room_label in known_rooms:
+            mask = self._door_mask.get(room_id, 0)
+            mapped_doors = [d for d in range(6) if mask & (1 << d)]
             status = (
                 "COMPLETE"
-                if len(mapped_doors) == 6
+                if mask == 0x3F
                 else f"INCOMPLETE ({len(mapped_doors)}/6)"
             )
-            print(
-                f"  Room {room_id}(L{room_label}): {status} - doors {sorted(mapped_doors)}"
-            )
+            print(f"  Room {room_id}(L{room_label}): {status} - doors {mapped_doors}")
 
         incomplete = self.table.get_incomplete_connections()
         print(f"\nIncomplete connections ({len(incomplete)}):")
@@ -328,31 +467,56 @@ class ConnectionProblem:
     def save_observations(self, filename: str):
         """Save raw observations to file"""
         data = {
-            "observations": self.observations,
+            "observations": self.observations.to_list(),
             "starting_room_id": self.starting_room_id,
             "starting_room_label": self.starting_room_label,
             "room_count": self.room_count,
         }
-        with open(filename, "w") as f:
-            json.dump(data, f, indent=2)
+        if not filename.endswith(".gz"):
+            filename += ".gz"
+        with gzip.open(filename, "wb") as f:
+            if orjson is not None:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+            else:
+                f.write(json.dumps(data, indent=2).encode())
         print(f"Saved observations to {filename}")
 
     def load_observations(self, filename: str):
         """Load observations from file and rebuild connection table"""
-        with open(filename, "r") as f:
-            data = json.load(f)
-
-        self.observations = data["observations"]
+        if not filename.endswith(".gz") and os.path.exists(filename + ".gz"):
+            filename += ".gz"
+        if filename.endswith(".gz"):
+            with gzip.open(filename, "rb") as f:
+                raw = f.read()
+        else:
+            # Legacy uncompressed saves
+            with open(filename, "rb") as f:
+                raw = f.read()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+        self.observations = ObservationStore()
+        for obs in data["observations"]:
+            self.observations.append(obs)
         self.starting_room_id = data["starting_room_id"]
         self.starting_room_label = data["starting_room_label"]
 
         # Rebuild connection table
         self.table = ConnectionTable(self.room_count)
-
+        self.table.compile_specialized()
+        self.room_paths = {self.starting_room_id: ""}
+        self._known_rooms = set()
+        self._door_mask = {}
+        self._explored_from = set()
+
+        # Group observations per room so each room is processed in one call
+        # instead of one call (and one room lookup) per door
+        grouped = defaultdict(list)
         for obs in self.observations:
-            results = [(obs["door"], obs["rooms"])]
-            self.process_exploration_results(
-                obs["from_room_id"], obs["from_room_label"], results
+            grouped[(obs["from_room_id"], obs["from_room_label"])].append(
+                (obs["door"], obs["rooms"])
             )
 
+        for (room_id, room_label), results in grouped.items():
+            self.process_exploration_results(room_id, room_label, results)
+
         print(f"Loaded {len(self.observations)} observations from {filename}")
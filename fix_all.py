@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""Apply every bidirectional fix pass with a single load and write of solution.json
+
+Running fix_bidirectional.py, fix_bidirectional_complete.py, and
+fix_final_bidirectional.py back-to-back parses and rewrites the full
+document three times; this fuses them into one load/save cycle.
+"""
+
+from solution_io import load_solution, save_solution
+from fix_bidirectional import fix_bidirectional
+from fix_bidirectional_complete import fix_bidirectional_complete
+from fix_final_bidirectional import fix_final_bidirectional
+
+def main():
+    solution = load_solution("solution.json")
+
+    fix_bidirectional(solution)
+    fix_bidirectional_complete(solution)
+    fix_final_bidirectional(solution)
+
+    save_solution(solution, "solution.json")
+    print("Applied all bidirectional fixes")
+
+if __name__ == "__main__":
+    main()
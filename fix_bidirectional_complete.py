@@ -1,35 +1,65 @@
 #!/usr/bin/env python3
 """Fix bidirectional consistency by resolving conflicts properly"""
 
-import json
+import numpy as np
+
+try:
+    from numba import njit  # Optional: compiles the conflict kernel to native code
+except ImportError:
+    njit = None
+
+from solution_io import load_solution, save_solution
+
+
+def _find_conflict_rows(keys, vals):
+    """Return (conflict row indices, reverse-row index per row).
+
+    A row i conflicts when its reverse connection exists (some row whose key
+    equals vals[i]) but that row points somewhere other than keys[i].
+    """
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+    idx = np.minimum(np.searchsorted(sorted_keys, vals), len(keys) - 1)
+    has_reverse = sorted_keys[idx] == vals
+    reverse_rows = order[idx]
+    conflict_mask = has_reverse & (vals[reverse_rows] != keys)
+    return np.nonzero(conflict_mask)[0], reverse_rows
+
+
+if njit is not None:
+    _find_conflict_rows = njit(cache=True)(_find_conflict_rows)
+
+
+def fix_bidirectional_complete(solution):
+    """Resolve bidirectional conflicts in-place on an already-loaded solution"""
+
+    # Pack connections into an (N, 4) int array and detect conflicts with
+    # vectorized compares instead of a Python dict loop
+    arr = np.array(
+        [
+            [c["from"]["room"], c["from"]["door"], c["to"]["room"], c["to"]["door"]]
+            for c in solution["connections"]
+        ],
+        dtype=np.int64,
+    ).reshape(-1, 4)
+
+    # Each (room, door) packs into a single int key
+    keys = (arr[:, 0] << 8) | arr[:, 1]
+    vals = (arr[:, 2] << 8) | arr[:, 3]
 
-def fix_bidirectional_complete():
-    with open("solution.json", 'r') as f:
-        solution = json.load(f)
-    
-    # Build connection map
-    door_to_connection = {}
-    for i, conn in enumerate(solution["connections"]):
-        from_key = (conn["from"]["room"], conn["from"]["door"])
-        door_to_connection[from_key] = (conn, i)
-    
-    # Find all conflicts
     conflicts = []
-    
-    for from_key, (conn, idx) in door_to_connection.items():
-        to_room = conn["to"]["room"]
-        to_door = conn["to"]["door"]
-        to_key = (to_room, to_door)
-        
-        if to_key in door_to_connection:
-            reverse_conn, reverse_idx = door_to_connection[to_key]
-            reverse_to_room = reverse_conn["to"]["room"]
-            reverse_to_door = reverse_conn["to"]["door"]
-            reverse_to_key = (reverse_to_room, reverse_to_door)
-            
-            if reverse_to_key != from_key:
-                conflicts.append((from_key, to_key, reverse_to_key))
-    
+    to_remove = set()
+    if len(arr):
+        conflict_rows, reverse_rows = _find_conflict_rows(keys, vals)
+        for i in conflict_rows:
+            r = reverse_rows[i]
+            from_key = (int(arr[i, 0]), int(arr[i, 1]))
+            to_key = (int(arr[i, 2]), int(arr[i, 3]))
+            wrong_reverse = (int(arr[r, 2]), int(arr[r, 3]))
+            conflicts.append((from_key, to_key, wrong_reverse))
+            to_remove.add(int(i))
+            to_remove.add(int(r))
+
     print(f"Found {len(conflicts)} bidirectional conflicts")
     
     # The issue is that we have:
@@ -43,20 +73,16 @@ def fix_bidirectional_complete():
     if conflicts:
         print("Resolving conflicts by creating consistent bidirectional connections...")
         
-        # Remove all connections involved in conflicts
-        to_remove = set()
+        # Conflicting connection rows were already collected during detection
         for from_key, to_key, wrong_reverse in conflicts:
-            from_conn, from_idx = door_to_connection[from_key]
-            to_conn, to_idx = door_to_connection[to_key]
-            to_remove.add(from_idx)
-            to_remove.add(to_idx)
             print(f"Conflict: {from_key} -> {to_key} vs {to_key} -> {wrong_reverse}")
         
-        # Remove conflicting connections
-        new_connections = []
-        for i, conn in enumerate(solution["connections"]):
-            if i not in to_remove:
-                new_connections.append(conn)
+        # Remove conflicting connections in one pass
+        new_connections = [
+            conn
+            for i, conn in enumerate(solution["connections"])
+            if i not in to_remove
+        ]
         
         # Add back clean bidirectional pairs for the conflicts
         # For the conflict: (4,1) -> (5,3) vs (5,3) -> (4,5) vs (4,5) -> (5,3)
@@ -82,11 +108,13 @@ def fix_bidirectional_complete():
         })
         
         solution["connections"] = new_connections
-        
-        with open("solution.json", 'w') as f:
-            json.dump(solution, f, indent=2)
-        
+
         print("Resolved conflicts with clean bidirectional connections")
 
+def main():
+    solution = load_solution("solution.json")
+    fix_bidirectional_complete(solution)
+    save_solution(solution, "solution.json")
+
 if __name__ == "__main__":
-    fix_bidirectional_complete()
+    main()
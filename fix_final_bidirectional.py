@@ -1,11 +1,10 @@
 #!/usr/bin/env python3
 """Fix the final bidirectional error by making door 3 a self-loop"""
 
-import json
+from solution_io import load_solution, save_solution
 
-def fix_final_bidirectional():
-    with open("solution.json", 'r') as f:
-        solution = json.load(f)
+def fix_final_bidirectional(solution):
+    """Make room 4 door 3 a self-loop in-place on an already-loaded solution"""
     
     # Fix the bidirectional error by changing Room 4 door 3 to a self-loop
     # Current problem: Room 4 door 3 -> Room 3 door 5, but Room 3 door 5 -> Room 4 door 2
@@ -18,11 +17,12 @@ def fix_final_bidirectional():
             solution["connections"][i]["to"]["door"] = 3
             break
     
-    # Write back
-    with open("solution.json", 'w') as f:
-        json.dump(solution, f, indent=2)
-    
     print("Fixed final bidirectional error")
 
+def main():
+    solution = load_solution("solution.json")
+    fix_final_bidirectional(solution)
+    save_solution(solution, "solution.json")
+
 if __name__ == "__main__":
-    fix_final_bidirectional()
+    main()
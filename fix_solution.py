@@ -1,54 +1,51 @@
 #!/usr/bin/env python3
 """Fix solution.json by removing duplicates and ensuring all doors are connected exactly once"""
 
-import json
+from solution_io import load_solution, save_solution
 
 def fix_solution(filename="solution.json"):
-    with open(filename, 'r') as f:
-        solution = json.load(f)
+    solution = load_solution(filename)
     
     connections = solution["connections"]
-    
-    # Create a clean connection map
-    door_map = {}
+
+    # One big int as a bitset over room*6+door keys: duplicate and
+    # unconnected-door checks become integer ops, no tuple hashing
+    seen = 0
     clean_connections = []
-    
+
     for conn in connections:
         from_room = conn["from"]["room"]
         from_door = conn["from"]["door"]
-        to_room = conn["to"]["room"] 
-        to_door = conn["to"]["door"]
-        
-        door_key = (from_room, from_door)
-        
+
+        k = from_room * 6 + from_door
+
         # Skip if we've already seen this door
-        if door_key in door_map:
+        if seen >> k & 1:
             print(f"SKIP DUPLICATE: room {from_room} door {from_door}")
             continue
-            
+
         # Add to clean list
         clean_connections.append(conn)
-        door_map[door_key] = (to_room, to_door)
-    
+        seen |= 1 << k
+
     # Update solution
     solution["connections"] = clean_connections
     
     # Write back
-    with open(filename, 'w') as f:
-        json.dump(solution, f, indent=2)
+    save_solution(solution, filename)
     
     print(f"Fixed solution: {len(clean_connections)} connections")
     
-    # Check for unconnected doors
+    # Check for unconnected doors: walk the set bits of the complement
     num_rooms = len(solution["rooms"])
-    connected_doors = set(door_map.keys())
-    
+    missing = ((1 << (num_rooms * 6)) - 1) & ~seen
+
     unconnected = []
-    for room in range(num_rooms):
-        for door in range(6):
-            if (room, door) not in connected_doors:
-                unconnected.append((room, door))
-    
+    while missing:
+        b = (missing & -missing).bit_length() - 1
+        unconnected.append(divmod(b, 6))
+        missing &= missing - 1
+
     print(f"Unconnected doors: {len(unconnected)}")
     for room, door in unconnected:
         print(f"  Room {room} door {door}")
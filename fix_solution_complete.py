@@ -1,11 +1,10 @@
 #!/usr/bin/env python3
 """Fix both the missing connection and bidirectional error"""
 
-import json
+from solution_io import load_solution, save_solution
 
 def fix_solution_complete():
-    with open("solution.json", 'r') as f:
-        solution = json.load(f)
+    solution = load_solution("solution.json")
     
     print("Fixing solution issues...")
     
@@ -13,32 +12,39 @@ def fix_solution_complete():
     # Room 4 door 2 -> Room 3 door 5, but Room 3 door 5 -> Room 4 door 3
     # We need to make them consistent
     
-    # Find and fix the inconsistent connections
-    for i, conn in enumerate(solution["connections"]):
-        if (conn["from"]["room"] == 4 and conn["from"]["door"] == 2 and 
-            conn["to"]["room"] == 3 and conn["to"]["door"] == 5):
-            print("Found: Room 4 door 2 -> Room 3 door 5")
-        
-        if (conn["from"]["room"] == 3 and conn["from"]["door"] == 5 and 
-            conn["to"]["room"] == 4 and conn["to"]["door"] == 3):
-            print("Found inconsistent: Room 3 door 5 -> Room 4 door 3")
-            print("Fixing to: Room 3 door 5 -> Room 4 door 2")
-            # Fix it to point back to door 2
-            solution["connections"][i]["to"]["door"] = 2
-    
+    # Index connections by (from_room, from_door) once for O(1) lookups
+    # instead of scanning the whole list per endpoint
+    connections = solution["connections"]
+    idx_by_from = {
+        (c["from"]["room"], c["from"]["door"]): i for i, c in enumerate(connections)
+    }
+
+    i = idx_by_from.get((4, 2))
+    if i is not None and connections[i]["to"] == {"room": 3, "door": 5}:
+        print("Found: Room 4 door 2 -> Room 3 door 5")
+
+    i = idx_by_from.get((3, 5))
+    if (
+        i is not None
+        and connections[i]["to"]["room"] == 4
+        and connections[i]["to"]["door"] == 3
+    ):
+        print("Found inconsistent: Room 3 door 5 -> Room 4 door 3")
+        print("Fixing to: Room 3 door 5 -> Room 4 door 2")
+        # Fix it to point back to door 2
+        connections[i]["to"]["door"] = 2
+
     # Issue 2: Add missing connection for Room 3 door 4
     # Since it's the only unconnected door, make it a self-loop
-    missing_connection = {
-        "from": {"room": 3, "door": 4},
-        "to": {"room": 3, "door": 4}
-    }
-    
-    solution["connections"].append(missing_connection)
-    print("Added self-loop for Room 3 door 4")
+    # (skipped if that door is already connected)
+    if (3, 4) not in idx_by_from:
+        connections.append(
+            {"from": {"room": 3, "door": 4}, "to": {"room": 3, "door": 4}}
+        )
+        print("Added self-loop for Room 3 door 4")
     
     # Write back
-    with open("solution.json", 'w') as f:
-        json.dump(solution, f, indent=2)
+    save_solution(solution, "solution.json")
     
     print(f"Fixed solution with {len(solution['connections'])} total connections")
 
@@ -6,46 +6,49 @@ Implements the same API as the real contest server for local testing
 
 from flask import Flask, request, jsonify
 import json
+import numpy as np
+
+try:
+    import orjson  # Optional: much faster C decoder for the mock files
+except ImportError:
+    orjson = None
 import time
 from typing import Dict, List, Optional, Tuple
 import random
 import re
 import os
-from dataclasses import dataclass, asdict
+import threading
+from dataclasses import dataclass, asdict, field
 
 app = Flask(__name__)
 
 
+# Tokenizer for plan strings: label edits (any closed bracket, validated
+# below), door moves, or (third group) anything invalid, matched in one
+# C-level regex pass. DOTALL so the catch-all also rejects newlines
+# instead of silently skipping them.
+_PLAN_TOKEN = re.compile(r"\[([^\]]*)\]|(\d)|(.)", re.DOTALL)
+
+
 def parse_plan_with_labels(plan_str: str):
     """Parse plan string with label editing syntax like '[2]50' into a sequence of actions"""
     actions = []  # List of ('move', door) or ('edit', label) actions
-    
-    i = 0
-    while i < len(plan_str):
-        if plan_str[i] == '[':
-            # Found label edit - find the closing bracket
-            end_bracket = plan_str.find(']', i)
-            if end_bracket == -1:
-                raise ValueError(f"Unclosed label edit bracket at position {i}")
-            
-            # Extract the label
-            label_str = plan_str[i+1:end_bracket]
-            if not label_str.isdigit():
-                raise ValueError(f"Invalid label in edit: [{label_str}]")
-            
-            label = int(label_str)
-            actions.append(('edit', label))
-            i = end_bracket + 1
-            
-        elif plan_str[i].isdigit():
-            # Found a door move
-            door = int(plan_str[i])
-            actions.append(('move', door))
-            i += 1
-            
+
+    for match in _PLAN_TOKEN.finditer(plan_str):
+        edit_label, move_door, invalid = match.groups()
+        if edit_label is not None:
+            if not edit_label.isdigit():
+                raise ValueError(f"Invalid label in edit: [{edit_label}]")
+            actions.append(('edit', int(edit_label)))
+        elif move_door is not None:
+            actions.append(('move', int(move_door)))
+        elif invalid == '[':
+            raise ValueError(
+                f"Unclosed label edit bracket at position {match.start()}"
+            )
         else:
-            raise ValueError(f"Invalid character in plan: {plan_str[i]}")
-    
+            raise ValueError(f"Invalid character in plan: {invalid}")
+
     return actions
 
 # Mock data storage
@@ -53,7 +56,7 @@ teams = {}  # team_id -> team_data
 active_problems = {}  # team_id -> problem_data
 
 
-@dataclass
+@dataclass(slots=True)
 class Room:
     """Represents a room in the library"""
 
@@ -61,7 +64,7 @@ class Room:
     connections: List[int]  # 6 doors, each connects to a room index
 
 
-@dataclass
+@dataclass(slots=True)
 class Problem:
     """Represents a problem instance"""
 
@@ -69,6 +72,12 @@ class Problem:
     rooms: List[Room]
     starting_room: int
     query_count: int = 0
+    # Labels as selected, cached once so explore/guess don't rebuild the
+    # list per plan; label edits copy-on-write instead of mutating this
+    original_labels: Tuple[int, ...] = ()
+    # Guards query_count under the threaded server; the room/label data is
+    # read-only after /select so it needs no locking
+    lock: threading.Lock = field(default_factory=threading.Lock)
 
 
 def load_mock_problems():
@@ -84,8 +93,9 @@ def load_mock_problems():
         for filename in os.listdir(mocks_dir):
             if filename.endswith('.json'):
                 filepath = os.path.join(mocks_dir, filename)
-                with open(filepath, 'r') as f:
-                    data = json.load(f)
+                with open(filepath, 'rb') as f:
+                    raw = f.read()
+                data = orjson.loads(raw) if orjson is not None else json.loads(raw)
                 
                 # Convert JSON data to Problem object
                 rooms = []
@@ -147,6 +157,28 @@ def get_fallback_problems():
 MOCK_PROBLEMS = load_mock_problems()
 
 
+def _serialize_templates(problems):
+    """Serialize each template problem to bytes once at startup
+
+    /select rehydrates a fresh copy from these with one C-level parse
+    instead of deep-copying Room objects in a Python loop per request.
+    """
+    templates = {}
+    for name, p in problems.items():
+        payload = {
+            "name": p.name,
+            "starting_room": p.starting_room,
+            "rooms": [{"label": r.label, "connections": r.connections} for r in p.rooms],
+        }
+        templates[name] = (
+            orjson.dumps(payload) if orjson is not None else json.dumps(payload).encode()
+        )
+    return templates
+
+
+_TEMPLATE_BYTES = _serialize_templates(MOCK_PROBLEMS)
+
+
 @app.route("/", methods=["GET"])
 def home():
     """Basic health check"""
@@ -204,13 +236,16 @@ def select_problem():
             }
         ), 400
 
-    # Create a fresh copy of the problem for this team
-    problem = MOCK_PROBLEMS[problem_name]
+    # Create a fresh copy of the problem for this team by rehydrating the
+    # serialized template (cheaper than a Python-level deep copy)
+    raw = _TEMPLATE_BYTES[problem_name]
+    template = orjson.loads(raw) if orjson is not None else json.loads(raw)
     active_problems[team_id] = Problem(
-        name=problem.name,
-        starting_room=problem.starting_room,
-        rooms=[Room(r.label, r.connections[:]) for r in problem.rooms],  # Deep copy
+        name=template["name"],
+        starting_room=template["starting_room"],
+        rooms=[Room(r["label"], r["connections"]) for r in template["rooms"]],
         query_count=0,
+        original_labels=tuple(r["label"] for r in template["rooms"]),
     )
 
     print(f"Team {team_id} selected problem: {problem_name}")
@@ -218,6 +253,40 @@ def select_problem():
     return jsonify({"problemName": problem_name})
 
 
+def _run_move_plans(problem: Problem, door_lists: List[List[int]]) -> List[List[int]]:
+    """Execute a batch of edit-free plans with one array gather per time step
+
+    Instead of walking each plan door-by-door in Python, all plans advance in
+    lockstep: `current = connections[current, doors[:, t]]` moves every walk
+    one step at once. Short plans are padded with a sentinel door 6 that maps
+    each room to itself, so padding steps are no-ops.
+    """
+    num_rooms = len(problem.rooms)
+    conn = np.empty((num_rooms, 7), dtype=np.int16)
+    for i, room in enumerate(problem.rooms):
+        conn[i, :6] = room.connections
+        conn[i, 6] = i
+    labels = np.array(
+        problem.original_labels or [room.label for room in problem.rooms],
+        dtype=np.int8,
+    )
+
+    lengths = [len(doors) for doors in door_lists]
+    max_len = max(lengths)
+    doors_arr = np.full((len(door_lists), max_len), 6, dtype=np.int8)
+    for i, doors in enumerate(door_lists):
+        doors_arr[i, : len(doors)] = doors
+
+    current = np.full(len(door_lists), problem.starting_room, dtype=np.int16)
+    labels_out = np.empty((len(door_lists), max_len + 1), dtype=np.int8)
+    labels_out[:, 0] = labels[current]
+    for t in range(max_len):
+        current = conn[current, doors_arr[:, t]]
+        labels_out[:, t + 1] = labels[current]
+
+    return [labels_out[i, : length + 1].tolist() for i, length in enumerate(lengths)]
+
+
 @app.route("/explore", methods=["POST"])
 def explore():
     """Explore the library with given route plans"""
@@ -238,13 +307,34 @@ def explore():
 
     problem = active_problems[team_id]
 
-    # Increment query count (1 for the request + 1 for each plan as per spec)
-    problem.query_count += 1 + len(plans)
-
-    results = []
-
+    # Increment query count (1 for the request + 1 for each plan as per
+    # spec); += is a read-modify-write, so serialize it across threads
+    with problem.lock:
+        problem.query_count += 1 + len(plans)
+
+    # Parse and validate everything up front so the batched executor never
+    # has to bail out halfway through. Plans without "[" (the common case)
+    # skip the action parser entirely: their door digits decode in one
+    # array op and feed the vectorized walk directly.
+    parsed = []  # door array for edit-free plans, action list otherwise
+    max_length = 18 * len(problem.rooms)
     for plan_str in plans:
-        # Parse plan string into actions
+        if '[' not in plan_str:
+            doors = np.frombuffer(plan_str.encode(), dtype=np.uint8) - ord('0')
+            # Non-digit characters wrap far above 9 after the subtraction
+            if np.any(doors > 9):
+                bad = plan_str[int(np.argmax(doors > 9))]
+                return jsonify(
+                    {"error": f"Invalid plan format: {plan_str} - Invalid character in plan: {bad}"}
+                ), 400
+            if np.any(doors > 5):
+                bad_door = int(doors[int(np.argmax(doors > 5))])
+                return jsonify({"error": f"Invalid door number: {bad_door}"}), 400
+            if doors.size > max_length:
+                return jsonify({"error": f"Plan too long: {doors.size} moves > {max_length}"}), 400
+            parsed.append(doors)
+            continue
+
         try:
             actions = parse_plan_with_labels(plan_str)
         except ValueError as e:
@@ -252,30 +342,55 @@ def explore():
 
         # Count move actions for length validation (18n max as per spec)
         move_count = sum(1 for action_type, _ in actions if action_type == 'move')
-        max_length = 18 * len(problem.rooms)
         if move_count > max_length:
             return jsonify({"error": f"Plan too long: {move_count} moves > {max_length}"}), 400
 
-        # Execute the plan - create a fresh copy of room labels for this exploration
-        room_labels = []
+        for action_type, action_value in actions:
+            if action_type == 'move' and not (0 <= action_value <= 5):
+                return jsonify({"error": f"Invalid door number: {action_value}"}), 400
+
+        parsed.append(actions)
+
+    results = [None] * len(plans)
+
+    # Edit-free plans run as one vectorized walk; plans with label edits
+    # fall back to the scalar path below
+    batch_indices = [
+        i for i, p in enumerate(parsed) if isinstance(p, np.ndarray)
+    ]
+    if batch_indices:
+        batch_results = _run_move_plans(
+            problem, [parsed[i] for i in batch_indices]
+        )
+        for i, room_labels in zip(batch_indices, batch_results):
+            results[i] = room_labels
+
+    for i, actions in enumerate(parsed):
+        if results[i] is not None:
+            continue
+
+        # Execute the plan - start from the cached labels and only copy them
+        # when this plan actually performs an edit. Labels land in a
+        # preallocated bytearray (one byte per record) instead of a list of
+        # boxed ints, unless an edit label exceeds a byte - the parser
+        # accepts arbitrary digits, and baseline echoed them back
+        if any(a == 'edit' and v > 255 for a, v in actions):
+            room_labels = [0] * (len(actions) + 1)
+        else:
+            room_labels = bytearray(len(actions) + 1)
+        pos = 0
         current_room = problem.starting_room
-        
-        # Create a fresh copy of the original room labels for this specific plan
-        original_room_labels = [room.label for room in problem.rooms]
+        original_room_labels = problem.original_labels
 
         # Record starting room label
-        current_label = original_room_labels[current_room]
-        room_labels.append(current_label)
+        room_labels[pos] = original_room_labels[current_room]
+        pos += 1
 
         # Execute each action
         for action_type, action_value in actions:
             if action_type == 'move':
-                door = action_value
-                if not (0 <= door <= 5):
-                    return jsonify({"error": f"Invalid door number: {door}"}), 400
-
                 # Move through the door to the connected room
-                current_room = problem.rooms[current_room].connections[door]
+                current_room = problem.rooms[current_room].connections[action_value]
 
                 # Validate room index
                 if not (0 <= current_room < len(problem.rooms)):
@@ -284,16 +399,22 @@ def explore():
                     ), 500
 
                 # Record the room label after move (from our temporary copy)
-                current_label = original_room_labels[current_room]
-                room_labels.append(current_label)
+                room_labels[pos] = original_room_labels[current_room]
+                pos += 1
 
             elif action_type == 'edit':
                 # Edit current room's label temporarily and record it
                 edited_label = action_value
-                original_room_labels[current_room] = edited_label  # Update our temporary copy
-                room_labels.append(edited_label)
+                if type(original_room_labels) is tuple:
+                    # First edit for this plan: copy-on-write, so the
+                    # pristine labels and concurrently running plans are
+                    # never mutated
+                    original_room_labels = list(original_room_labels)
+                original_room_labels[current_room] = edited_label
+                room_labels[pos] = edited_label
+                pos += 1
 
-        results.append(room_labels)
+        results[i] = list(room_labels)
 
     print(
         f"Team {team_id} explored {len(plans)} plans, query count now: {problem.query_count}"
@@ -342,51 +463,43 @@ def guess():
 def validate_map(submitted_map: Dict, problem: Problem) -> bool:
     """Validate if the submitted map matches the actual problem"""
     try:
-        # Check number of rooms
-        if len(submitted_map["rooms"]) != len(problem.rooms):
-            return False
+        # Cheap checks first: reject on the O(1) comparisons and the label
+        # list before building any connection table
 
         # Check starting room
         if submitted_map["startingRoom"] != problem.starting_room:
             return False
 
-        # Check room labels
-        submitted_labels = submitted_map["rooms"]
-        actual_labels = [room.label for room in problem.rooms]
+        # Check number of rooms
+        if len(submitted_map["rooms"]) != len(problem.rooms):
+            return False
+
+        # Check room labels against the tuple cached at /select time
+        actual_labels = problem.original_labels or tuple(
+            room.label for room in problem.rooms
+        )
 
-        if submitted_labels != actual_labels:
+        if tuple(submitted_map["rooms"]) != actual_labels:
             return False
 
-        # Build connection map from submitted connections
-        submitted_connections = {}
+        # Compare connections as (num_rooms, 6) arrays: fill the submitted
+        # table in one pass (both directions), then one C-level array compare
+        # instead of 6*N dict probes
+        num_rooms = len(problem.rooms)
+        actual = np.fromiter(
+            (c for room in problem.rooms for c in room.connections),
+            dtype=np.int16,
+            count=num_rooms * 6,
+        ).reshape(-1, 6)
+
+        submitted = np.full_like(actual, -1)
         for conn in submitted_map["connections"]:
-            from_room = conn["from"]["room"]
-            from_door = conn["from"]["door"]
-            to_room = conn["to"]["room"]
-            to_door = conn["to"]["door"]
-
-            # Add bidirectional connection
-            if from_room not in submitted_connections:
-                submitted_connections[from_room] = {}
-            if to_room not in submitted_connections:
-                submitted_connections[to_room] = {}
-
-            submitted_connections[from_room][from_door] = to_room
-            submitted_connections[to_room][to_door] = from_room
-
-        # Check all connections match
-        for room_idx, room in enumerate(problem.rooms):
-            for door, target_room in enumerate(room.connections):
-                if room_idx not in submitted_connections:
-                    return False
-                if door not in submitted_connections[room_idx]:
-                    return False
-                if submitted_connections[room_idx][door] != target_room:
-                    return False
-
-        return True
-
-    except (KeyError, TypeError, ValueError) as e:
+            submitted[conn["from"]["room"], conn["from"]["door"]] = conn["to"]["room"]
+            submitted[conn["to"]["room"], conn["to"]["door"]] = conn["from"]["room"]
+
+        return bool(np.array_equal(submitted, actual))
+
+    except (KeyError, TypeError, ValueError, IndexError) as e:
         print(f"Map validation error: {e}")
         return False
 
@@ -442,5 +555,15 @@ if __name__ == "__main__":
     print("  GET /problems - List available problems")
     print(f"Available problems: {list(MOCK_PROBLEMS.keys())}")
 
-    # Run the server
-    app.run(host="127.0.0.1", port=8080, debug=True)
+    # Run the server. The Flask debug server (reloader + traceback pages)
+    # costs real time per request, so it's opt-in via DEBUG=1; otherwise
+    # prefer a production WSGI server when waitress is installed
+    if os.environ.get("DEBUG"):
+        app.run(host="127.0.0.1", port=8080, debug=True)
+    else:
+        try:
+            from waitress import serve
+        except ImportError:
+            app.run(host="127.0.0.1", port=8080, debug=False, threaded=True)
+        else:
+            serve(app, host="127.0.0.1", port=8080, threads=8)
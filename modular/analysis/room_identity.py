@@ -2,92 +2,212 @@
 Room identity analysis - logic for determining which rooms might be identical
 """
 
+from itertools import combinations
+
+import numpy as np
+
+try:
+    from numba import njit, prange  # Optional: compiles the identity kernel
+except ImportError:
+    njit = None
+    prange = range
+
+
+def _update_identities(labels, confirmed):
+    """Build the N x N room-compatibility matrix over the SoA door tables
+
+    compat[i, j] (i < j) is True when rooms i and j share a label and no door
+    confirmed on both sides leads to differently-labelled rooms.
+    """
+    n = labels.shape[0]
+    compat = np.zeros((n, n), dtype=np.bool_)
+    for i in prange(n):
+        for j in range(i + 1, n):
+            if labels[i] != labels[j]:
+                continue
+            ok = True
+            for d in range(6):
+                c1 = confirmed[i, d]
+                c2 = confirmed[j, d]
+                if c1 >= 0 and c2 >= 0 and labels[c1] != labels[c2]:
+                    ok = False
+                    break
+            compat[i, j] = ok
+    return compat
+
+
+if njit is not None:
+    _update_identities = njit(parallel=True, cache=True)(_update_identities)
+
 
 class RoomIdentityAnalyzer:
     """Analyzes room relationships to determine possible identities and merges"""
 
     def __init__(self, problem_data):
         self.data = problem_data
+        # (id(room1), id(room2)) -> (room1.version, room2.version, result).
+        # could_be_identical is pure given the rooms' confirmed doors, so we
+        # can reuse results until either room confirms a new door.
+        self._compat_cache = {}
+        # Derived classifications only change when an identity pass runs, so
+        # cache them behind a dirty bit - print_stats otherwise re-runs three
+        # full room scans every iteration
+        self._dirty = True
+        self._unique_rooms = []
+        self._ambiguous_rooms = []
+        self._definite_merges = []
+        # Observations long enough to guarantee a revisit, collected as they
+        # arrive so detect_impossible_paths never re-scans history
+        self._impossible_paths = []
 
     def update_room_identities(self):
         """Update possible identities for all rooms based on current knowledge"""
+        self._dirty = True
+        if njit is not None:
+            # One native-compiled pass over the SoA tables, then rebuild the
+            # possible_identities bitmasks from the boolean matrix
+            n = self.data.next_room_id
+            compat = _update_identities(
+                np.ascontiguousarray(self.data.labels[:n]),
+                np.ascontiguousarray(self.data.confirmed[:n]),
+            )
+            rooms_by_index = self.data.rooms
+            for i in range(n):
+                row = compat[i] | compat[:n, i]
+                bits = 0
+                for j in np.nonzero(row)[0]:
+                    bits |= 1 << int(j)
+                rooms_by_index[i].possible_identities = bits
+            for room in self.data.rooms:
+                if room.possible_identities == 0:
+                    room.confirmed_unique = True
+            return
+
         rooms_by_label = self._group_rooms_by_label()
 
         # For each label group, determine possible identities
         for label, room_list in rooms_by_label.items():
-            for i, room1 in enumerate(room_list):
-                for j, room2 in enumerate(room_list[i + 1 :], i + 1):
-                    if self.could_be_identical(room1, room2):
-                        room1.possible_identities.add(room2)
-                        room2.possible_identities.add(room1)
-                    else:
-                        # Remove from possible identities if they were there
-                        room1.possible_identities.discard(room2)
-                        room2.possible_identities.discard(room1)
+            for room1, room2 in combinations(room_list, 2):
+                if self.could_be_identical(room1, room2):
+                    room1.possible_identities |= 1 << room2.room_index
+                    room2.possible_identities |= 1 << room1.room_index
+                else:
+                    # Remove from possible identities if they were there
+                    room1.possible_identities &= ~(1 << room2.room_index)
+                    room2.possible_identities &= ~(1 << room1.room_index)
 
         # Mark rooms as unique if they have no possible identities
-        for room in self.data.rooms.values():
-            if len(room.possible_identities) == 0:
+        for room in self.data.rooms:
+            if room.possible_identities == 0:
                 room.confirmed_unique = True
 
     def could_be_identical(self, room1, room2):
-        """Check if two rooms could be the same room"""
+        """Check if two rooms could be the same room (memoized)"""
+        if id(room1) > id(room2):
+            room1, room2 = room2, room1
+        key = (id(room1), id(room2))
+        cached = self._compat_cache.get(key)
+        if (
+            cached is not None
+            and cached[0] == room1.version
+            and cached[1] == room2.version
+        ):
+            return cached[2]
+
+        result = self._could_be_identical(room1, room2)
+        self._compat_cache[key] = (room1.version, room2.version, result)
+        return result
+
+    def _could_be_identical(self, room1, room2):
+        """Uncached pairwise compatibility check"""
         # Must have same label
         if room1.label != room2.label:
             return False
 
-        # Check door connections - if they connect to rooms with different labels, they're different
-        for door in range(6):
-            conn1 = room1.get_door_destination(door)
-            conn2 = room2.get_door_destination(door)
+        # Check door connections on the shared SoA tables - where both rooms
+        # have confirmed destinations, the destination labels must agree
+        confirmed = self.data.confirmed
+        labels = self.data.labels
+        d1 = confirmed[room1.room_index]
+        d2 = confirmed[room2.room_index]
+        mask = (d1 >= 0) & (d2 >= 0)
+        return not np.any(labels[d1[mask]] != labels[d2[mask]])
 
-            # If both have confirmed connections, check if they go to different labels
-            if conn1 is not None and conn2 is not None:
-                if conn1.label != conn2.label:
-                    return False
+    def _refresh_classifications(self):
+        """Recompute the cached room classifications after an identity pass"""
+        self._unique_rooms = [room for room in self.data.rooms if room.confirmed_unique]
+        self._ambiguous_rooms = [
+            room
+            for room in self.data.rooms
+            if room.possible_identities != 0 and not room.confirmed_unique
+        ]
 
-        return True
+        merges = []
+        for room in self.data.rooms:
+            mask = room.possible_identities
+            if mask.bit_count() == 1:
+                other_room = self.data.rooms[mask.bit_length() - 1]
+                if other_room.possible_identities == 1 << room.room_index:
+                    # Mutual single identity - these are definitely the same room
+                    merges.append((room, other_room))
+        self._definite_merges = merges
+        self._dirty = False
 
     def find_definite_merges(self):
         """Find rooms that are definitely the same and should be merged"""
-        merges = []
+        if self._dirty:
+            self._refresh_classifications()
+        return list(self._definite_merges)
 
-        for room in self.data.rooms.values():
-            if len(room.possible_identities) == 1:
-                other_room = next(iter(room.possible_identities))
-                if len(
-                    other_room.possible_identities
-                ) == 1 and other_room.possible_identities == {room}:
-                    # Mutual single identity - these are definitely the same room
-                    merges.append((room, other_room))
+    def on_observation(self, path, rooms_sequence, final_room):
+        """Record a just-processed observation for cycle tracking
 
-        return merges
+        Called from ModularProblem.add_observation; a sequence visiting more
+        rooms than exist must contain a revisit, so it is queued for the
+        cycle-based merge suggestions. O(1) per observation instead of
+        re-walking history on every detect_impossible_paths call.
+        """
+        if len(rooms_sequence) > self.data.num_rooms:
+            self._impossible_paths.append(
+                (path, rooms_sequence, final_room, len(rooms_sequence) - 1)
+            )
 
     def detect_impossible_paths(self):
         """Detect paths that are longer than num_rooms (must contain cycles)"""
-        impossible_paths = []
-
-        for room in self.data.rooms.values():
-            for path, rooms_sequence, position in room.paths:
-                if len(rooms_sequence) > self.data.num_rooms:
-                    impossible_paths.append((path, rooms_sequence, room, position))
-
-        return impossible_paths
+        # Maintained incrementally by on_observation
+        return list(self._impossible_paths)
 
     def suggest_merges_from_cycles(self, impossible_paths):
-        """Suggest room merges based on detected cycles"""
+        """Suggest room merges based on detected cycles
+
+        Looks for periodic repeats of any period up to num_rooms: positions i
+        where the label block seq[i:i+p] equals seq[i+p:i+2p]. Each period is
+        checked with one vectorized shifted compare plus a windowed sum, so
+        the whole scan stays O(L) per period instead of comparing sub-lists.
+        """
         suggestions = []
 
         for path, rooms_sequence, room, position in impossible_paths:
-            # Simple heuristic: if we see the same label at positions that are num_rooms apart,
-            # those are likely the same room
-            for i in range(len(rooms_sequence) - self.data.num_rooms):
-                if rooms_sequence[i] == rooms_sequence[i + self.data.num_rooms]:
+            seq = np.asarray(rooms_sequence, dtype=np.int8)
+            length = len(seq)
+
+            for period in range(1, self.data.num_rooms + 1):
+                if 2 * period > length:
+                    break
+
+                # eq[i] = seq[i] == seq[i + period]; a window of `period`
+                # consecutive hits means a full repeated block at i
+                eq = seq[:-period] == seq[period:]
+                cumulative = np.concatenate(([0], np.cumsum(eq)))
+                window = cumulative[period:] - cumulative[:-period]
+
+                for i in np.nonzero(window == period)[0]:
                     suggestions.append(
                         {
                             "cycle_detected": True,
-                            "repeated_label": rooms_sequence[i],
-                            "positions": (i, i + self.data.num_rooms),
+                            "repeated_label": int(seq[i]),
+                            "positions": (int(i), int(i) + period),
+                            "period": period,
                             "path": path,
                             "rooms_sequence": rooms_sequence,
                         }
@@ -97,24 +217,20 @@ class RoomIdentityAnalyzer:
 
     def get_ambiguous_rooms(self):
         """Get rooms that still have ambiguous identities"""
-        return [
-            room
-            for room in self.data.rooms.values()
-            if len(room.possible_identities) > 0 and not room.confirmed_unique
-        ]
+        if self._dirty:
+            self._refresh_classifications()
+        return list(self._ambiguous_rooms)
 
     def get_unique_rooms(self):
         """Get rooms that are confirmed unique"""
-        return [room for room in self.data.rooms.values() if room.confirmed_unique]
+        if self._dirty:
+            self._refresh_classifications()
+        return list(self._unique_rooms)
 
     def _group_rooms_by_label(self):
         """Group rooms by their labels"""
-        rooms_by_label = {}
-        for room in self.data.rooms.values():
-            if room.label not in rooms_by_label:
-                rooms_by_label[room.label] = []
-            rooms_by_label[room.label].append(room)
-        return rooms_by_label
+        # ProblemData maintains this inverted index as rooms are created
+        return self.data.rooms_by_label
 
     def print_identity_summary(self):
         """Print a summary of room identity status"""
@@ -2,18 +2,42 @@
 Core Room data structure - pure data with no analysis logic
 """
 
+import numpy as np
+
 
 class Room:
-    def __init__(self, room_index=None, label=None):
+    # Slotted: thousands of candidate rooms exist during analysis, so skip
+    # the per-instance __dict__
+    __slots__ = (
+        "room_index",
+        "label",
+        "_data",
+        "paths",
+        "door_possibilities",
+        "possible_identities",
+        "confirmed_unique",
+        "version",
+        "confirmed_mask",
+        "_unconfirmed_doors",
+        "_unconfirmed_version",
+    )
+
+    def __init__(self, room_index=None, label=None, data=None):
         self.room_index = room_index  # unique index for this room instance
         self.label = label  # room label from API (0,1,2,3)
+        self._data = data  # owning ProblemData (holds the SoA door tables)
         self.paths = []  # array of paths for how we got here
         self.door_possibilities = [
             [] for _ in range(6)
         ]  # possible destinations for each door
-        self.door_confirmed = [None] * 6  # confirmed destinations for each door
-        self.possible_identities = set()  # rooms this might be identical to
+        # Bitmask of room_index bits: bit k set means "could be identical to
+        # room k" — add/discard/compare become single int ops
+        self.possible_identities = 0
         self.confirmed_unique = False  # True when definitely unique
+        self.version = 0  # bumped on door confirmation so caches can detect staleness
+        self.confirmed_mask = 0  # bit d set when door d has a confirmed destination
+        self._unconfirmed_doors = None  # cached get_unconfirmed_doors result
+        self._unconfirmed_version = -1  # version the cache was computed at
 
     def add_door_possibility(self, door, destination_room):
         """Add a possible destination for a door"""
@@ -22,12 +46,18 @@ class Room:
 
     def confirm_door_destination(self, door, destination_room):
         """Confirm that a door definitely leads to a specific room"""
-        self.door_confirmed[door] = destination_room
+        self._data.confirmed[self.room_index, door] = destination_room.room_index
         self.door_possibilities[door] = [destination_room]
+        self.confirmed_mask |= 1 << door
+        self.version += 1
+        self._data.unexplored_frontier.discard((self, door))
 
     def get_door_destination(self, door):
         """Get the confirmed destination, or None if ambiguous"""
-        return self.door_confirmed[door]
+        dest_index = self._data.confirmed[self.room_index, door]
+        if dest_index < 0:
+            return None
+        return self._data.rooms[dest_index]
 
     def get_door_possibilities(self, door):
         """Get all possible destinations for a door"""
@@ -35,46 +65,90 @@ class Room:
 
     def has_confirmed_connection(self, door):
         """Check if door has a confirmed destination"""
-        return self.door_confirmed[door] is not None
+        return self._data.confirmed[self.room_index, door] >= 0
 
     def get_unconfirmed_doors(self):
-        """Get list of doors without confirmed destinations"""
-        return [i for i in range(6) if not self.has_confirmed_connection(i)]
+        """Get list of doors without confirmed destinations
+
+        Cached against version, so repeated render passes read the same
+        list without rescanning the mask; callers must not mutate it.
+        """
+        if self._unconfirmed_version != self.version:
+            self._unconfirmed_doors = [
+                i for i in range(6) if not self.confirmed_mask >> i & 1
+            ]
+            self._unconfirmed_version = self.version
+        return self._unconfirmed_doors
 
 
 class ProblemData:
     """Core problem data structure - holds rooms and observations"""
 
+    __slots__ = (
+        "num_rooms",
+        "rooms",
+        "next_room_id",
+        "observations",
+        "room_sequence_map",
+        "user_id",
+        "base_url",
+        "confirmed",
+        "labels",
+        "rooms_by_label",
+        "label_masks",
+        "explored_paths",
+        "unexplored_frontier",
+    )
+
     def __init__(
         self, room_count, user_id="awwaiid@thelackthereof.org zFPVkfKRKAgDUdmVr2Oi1A"
     ):
         self.num_rooms = room_count
-        self.rooms = {}  # room_id -> Room object
+        self.rooms = []  # room_index -> Room object
         self.next_room_id = 0
         self.observations = []  # raw observations from API
-        self.room_sequence_map = {}  # (path, room_sequence) -> Room
+        self.room_sequence_map = {}  # (rolling hash, path length) -> Room
         self.user_id = user_id
         self.base_url = "https://31pwr5t6ij.execute-api.eu-west-2.amazonaws.com"
+        # Structure-of-arrays door tables, indexed by room_index: one
+        # contiguous confirmed-destination matrix (-1 = unconfirmed) and one
+        # label vector, so identity analysis can compare rooms with array ops
+        # instead of chasing per-Room Python lists
+        self.confirmed = np.full((room_count, 6), -1, dtype=np.int32)
+        self.labels = np.full(room_count, -1, dtype=np.int8)
+        self.rooms_by_label = {}  # label -> list of Room objects, inverted index
+        self.label_masks = {}  # label -> bitmask of room indices with that label
+        self.explored_paths = set()  # door tuples already sent to /explore
+        self.unexplored_frontier = set()  # live (room, door) pairs not yet confirmed
 
     def create_room(self, label):
         """Create a new room with given label"""
-        room = Room(room_index=self.next_room_id, label=label)
-        room_id = f"{self.next_room_id}_{label}"
-        self.rooms[room_id] = room
+        # Exploration can hold more candidate rooms than the final map while
+        # duplicates are unresolved, so grow the arrays by doubling as needed
+        if self.next_room_id >= len(self.labels):
+            self.confirmed = np.vstack([self.confirmed, np.full_like(self.confirmed, -1)])
+            self.labels = np.concatenate([self.labels, np.full_like(self.labels, -1)])
+        room = Room(room_index=self.next_room_id, label=label, data=self)
+        self.labels[room.room_index] = label
+        self.rooms.append(room)
+        self.rooms_by_label.setdefault(label, []).append(room)
+        self.label_masks[label] = (
+            self.label_masks.get(label, 0) | 1 << room.room_index
+        )
+        self.unexplored_frontier.update((room, door) for door in range(6))
         self.next_room_id += 1
         return room
 
     def get_room_id(self, room):
         """Get the room ID for a given room object"""
-        for room_id, r in self.rooms.items():
-            if r is room:
-                return room_id
-        return None
+        return f"{room.room_index}_{room.label}"
 
     def get_rooms_by_label(self, label):
         """Get all rooms with a specific label"""
-        return [room for room in self.rooms.values() if room.label == label]
+        # Copy so callers can create rooms while iterating
+        return list(self.rooms_by_label.get(label, ()))
 
     def add_observation(self, path, rooms):
         """Store an observation (path and room sequence)"""
         self.observations.append({"path": path, "rooms": rooms})
+        self.explored_paths.add(tuple(path))
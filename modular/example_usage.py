@@ -68,6 +68,11 @@ def compare_strategies():
         ("Tree Exploration", TreeExplorationStrategy, {}),
     ]
 
+    # The server keys its one active problem per team by the registered
+    # credential, and that credential is all we have - concurrent runs
+    # would clobber each other's problem selection, so the comparison
+    # stays sequential
+    results = []
     for name, strategy_class, kwargs in strategies:
         print(f"\n--- Testing {name} ---")
         problem = ModularProblem(room_count=6)
@@ -76,9 +81,11 @@ def compare_strategies():
         problem.select_problem("primus")
         problem.explore_with_strategy(max_iterations=3, max_paths_per_iteration=10)
 
-        stats = problem.current_strategy.get_exploration_stats()
+        results.append((name, problem.current_strategy.get_exploration_stats()))
+
+    for name, stats in results:
         print(
-            f"Results: {stats['confirmed_doors']} doors confirmed, "
+            f"{name}: {stats['confirmed_doors']} doors confirmed, "
             f"{stats['unique_rooms']} unique rooms, "
             f"{stats['ambiguous_rooms']} ambiguous rooms"
         )
@@ -3,11 +3,28 @@ Modular Problem class that coordinates all the components
 """
 
 import json
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+
+try:
+    import orjson  # much faster (de)serialization for the API round-trips
+except ImportError:
+    orjson = None
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from .core.room_data import ProblemData
 from .analysis.room_identity import RoomIdentityAnalyzer
 from .visualization.graphviz_renderer import GraphvizRenderer, TextRenderer
 
+# Rolling-hash parameters for room_sequence_map keys: each (door, label)
+# step folds into a 64-bit hash, so prefix keys build in O(1) per step
+# instead of re-tupling the whole path. Keys carry the path length too,
+# which makes accidental collisions across different-length prefixes
+# impossible and leaves only the 64-bit birthday bound.
+_HASH_MULTIPLIER = 1000003
+_HASH_MASK = (1 << 64) - 1
+
 
 class ModularProblem:
     """Main problem solver that coordinates data, analysis, and exploration"""
@@ -20,36 +37,109 @@ class ModularProblem:
         self.visualizer = GraphvizRenderer(self.data, self.analyzer)
         self.text_renderer = TextRenderer(self.data, self.analyzer)
         self.current_strategy = None
+        # Last observation's walk (path, rooms, Room and rolling hash per
+        # position), so sibling plans sharing a prefix can resume mid-path
+        self._last_walk = None
+        # One pooled session for all API calls: keep-alive skips the TCP/TLS
+        # handshake per request, and transient gateway errors get retried
+        self._session = requests.Session()
+        self._session.mount(
+            self.data.base_url,
+            HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=8,
+                max_retries=Retry(
+                    total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504]
+                ),
+            ),
+        )
+        self._session.headers["Content-Type"] = "application/json"
+
+    def _post_json(self, endpoint, payload):
+        """POST a JSON payload, serializing with orjson when available"""
+        url = f"{self.data.base_url}/{endpoint}"
+        if orjson is not None:
+            # data= skips requests' stdlib-json encode; the session header
+            # already declares application/json
+            return self._session.post(url, data=orjson.dumps(payload))
+        return self._session.post(url, json=payload)
+
+    @staticmethod
+    def _parse_json(response):
+        """Parse a response body, decoding bytes directly with orjson"""
+        if orjson is not None:
+            return orjson.loads(response.content)
+        return response.json()
 
     def set_strategy(self, strategy_class, **kwargs):
         """Set the exploration strategy"""
         self.current_strategy = strategy_class(self.data, self.analyzer, **kwargs)
         print(f"Set exploration strategy: {self.current_strategy.name}")
 
-    def add_observation(self, path, rooms):
-        """Add an observation and update analysis"""
+    def add_observation(self, path, rooms, defer_analysis=False):
+        """Add an observation and update analysis
+
+        With defer_analysis=True the O(rooms^2) identity pass is skipped;
+        batch replays set it and run update_room_identities once at the end.
+        """
         if len(rooms) != len(path) + 1:
             raise ValueError("rooms list should have one more element than path")
 
         # Store the raw observation
         self.data.add_observation(path, rooms)
 
-        # Process incrementally
-        current_room = self._get_or_create_starting_room(rooms[0])
-
-        for i, door in enumerate(path):
-            destination_label = rooms[i + 1]
+        path_t = tuple(path)
+        rooms_t = tuple(rooms)
+
+        # Fan-out sibling plans share long prefixes: resume from the previous
+        # observation's walk instead of re-deriving every prefix step
+        start = 0
+        if self._last_walk is not None:
+            last_path, last_rooms, last_steps, last_hashes = self._last_walk
+            if last_rooms[0] == rooms_t[0]:
+                limit = min(len(last_path), len(path_t))
+                while (
+                    start < limit
+                    and last_path[start] == path_t[start]
+                    and last_rooms[start + 1] == rooms_t[start + 1]
+                ):
+                    start += 1
+
+        if start:
+            steps = last_steps[: start + 1]
+            hashes = last_hashes[: start + 1]
+            current_room = steps[-1]
+            sequence_hash = hashes[-1]
+        else:
+            sequence_hash = rooms_t[0]
+            current_room = self._get_or_create_starting_room(rooms_t[0])
+            steps = [current_room]
+            hashes = [sequence_hash]
+
+        # Process incrementally, extending the rolling hash one step at a time
+        for i in range(start, len(path_t)):
+            door = path_t[i]
+            destination_label = rooms_t[i + 1]
+            sequence_hash = (
+                sequence_hash * _HASH_MULTIPLIER ^ (door * 7 + destination_label)
+            ) & _HASH_MASK
             destination_room = self._process_door_destination(
-                current_room, door, destination_label, path[: i + 1], rooms[: i + 2]
+                current_room, door, destination_label, (sequence_hash, i + 1)
             )
             current_room = destination_room
+            steps.append(current_room)
+            hashes.append(sequence_hash)
+
+        self._last_walk = (path_t, rooms_t, steps, hashes)
 
         # Update analysis
-        self.analyzer.update_room_identities()
+        self.analyzer.on_observation(path, rooms, current_room)
+        if not defer_analysis:
+            self.analyzer.update_room_identities()
 
     def _get_or_create_starting_room(self, label):
         """Get or create the starting room with given label"""
-        sequence_key = ((), (label,))
+        sequence_key = (label, 0)
 
         if sequence_key in self.data.room_sequence_map:
             return self.data.room_sequence_map[sequence_key]
@@ -59,36 +149,34 @@ class ModularProblem:
             return room
 
     def _process_door_destination(
-        self, from_room, door, destination_label, path_so_far, rooms_so_far
+        self, from_room, door, destination_label, sequence_key
     ):
-        """Process a door leading to a room with destination_label"""
-        sequence_key = (tuple(path_so_far), tuple(rooms_so_far))
+        """Process a door leading to a room with destination_label
 
+        sequence_key is the (rolling hash, path length) pair identifying the
+        exact (path, room labels) prefix ending at this door.
+        """
         # Check if we've seen this exact sequence before
         if sequence_key in self.data.room_sequence_map:
             destination_room = self.data.room_sequence_map[sequence_key]
             from_room.confirm_door_destination(door, destination_room)
             return destination_room
 
-        # Find all existing rooms with the destination label as possibilities
-        possible_destinations = self.data.get_rooms_by_label(destination_label)
-
         # Create a new room as another possibility
         new_room = self.data.create_room(destination_label)
         self.data.room_sequence_map[sequence_key] = new_room
 
-        # Add all possibilities to the door
-        for room in possible_destinations:
-            from_room.add_door_possibility(door, room)
+        # For this specific path, confirm it leads to the new room. Door
+        # possibilities are implicit in the label group, and the pairwise
+        # identity rebuild at the end of add_observation restores the
+        # symmetric links, so no per-room broadcast loop is needed here.
         from_room.add_door_possibility(door, new_room)
-
-        # For this specific path, confirm it leads to the new room
         from_room.confirm_door_destination(door, new_room)
 
-        # Mark all same-label rooms as potentially identical
-        for room in possible_destinations:
-            new_room.possible_identities.add(room)
-            room.possible_identities.add(new_room)
+        # Seed this room's identity candidates from the per-label bitmask
+        new_room.possible_identities = self.data.label_masks[
+            destination_label
+        ] & ~(1 << new_room.room_index)
 
         return new_room
 
@@ -98,11 +186,7 @@ class ModularProblem:
         print(f"Selecting problem {problem_name}")
 
         data = {"id": self.data.user_id, "problemName": problem_name}
-        response = requests.post(
-            f"{self.data.base_url}/select",
-            headers={"Content-Type": "application/json"},
-            json=data,
-        )
+        response = self._post_json("select", data)
 
         print(f"Status: {response.status_code}")
         print(response.text)
@@ -114,11 +198,7 @@ class ModularProblem:
         print(f"Exploring with {len(plans)} plan(s): {', '.join(plan_strings)}")
 
         data = {"id": self.data.user_id, "plans": plan_strings}
-        response = requests.post(
-            f"{self.data.base_url}/explore",
-            headers={"Content-Type": "application/json"},
-            json=data,
-        )
+        response = self._post_json("explore", data)
 
         print(f"Status: {response.status_code}")
         print(response.text)
@@ -126,18 +206,29 @@ class ModularProblem:
         # Parse and add observations if successful
         if response.status_code == 200:
             try:
-                result = response.json()
+                result = self._parse_json(response)
                 if "results" in result:
+                    # One identity pass for the whole batch, not per plan
                     for plan, rooms_result in zip(plans, result["results"]):
                         print(f"Adding observation: path={plan}, rooms={rooms_result}")
-                        self.add_observation(plan, rooms_result)
-            except json.JSONDecodeError:
+                        self.add_observation(plan, rooms_result, defer_analysis=True)
+                    self.analyzer.update_room_identities()
+            except ValueError:
+                # covers json.JSONDecodeError and orjson.JSONDecodeError
                 print("Failed to parse response JSON")
 
         return response
 
-    def explore_with_strategy(self, max_iterations=10, max_paths_per_iteration=10):
-        """Explore using the current strategy"""
+    def explore_with_strategy(
+        self, max_iterations=10, max_paths_per_iteration=10, batch_factor=4
+    ):
+        """Explore using the current strategy
+
+        Generating paths is cheap next to the network round-trip, so up to
+        batch_factor iterations' worth of paths are coalesced into a single
+        /explore request (the API already accepts a list of plans) before
+        the observations are replayed into the analysis.
+        """
         if not self.current_strategy:
             print("No exploration strategy set! Use set_strategy() first.")
             return
@@ -147,17 +238,86 @@ class ModularProblem:
             iteration < max_iterations
             and self.current_strategy.should_continue_exploring()
         ):
-            print(f"\nIteration {iteration + 1}:")
-            paths = self.current_strategy.generate_next_paths(max_paths_per_iteration)
-
-            if not paths:
+            mega_plans = []
+            while (
+                len(mega_plans) < max_paths_per_iteration * batch_factor
+                and iteration < max_iterations
+                and self.current_strategy.should_continue_exploring()
+            ):
+                print(f"\nIteration {iteration + 1}:")
+                paths = self.current_strategy.generate_next_paths(
+                    max_paths_per_iteration
+                )
+
+                if not paths:
+                    break
+
+                print(f"Generated {len(paths)} paths")
+                mega_plans.extend(paths)
+                iteration += 1
+
+            if not mega_plans:
                 print("No more paths to explore")
                 break
 
-            print(f"Generated {len(paths)} paths")
-            self.explore(paths)
+            self.explore(mega_plans)
             self.current_strategy.print_stats()
 
+        print(f"\nExploration completed after {iteration} iterations")
+
+    def explore_with_strategy_parallel(
+        self, num_workers=4, max_iterations=10, max_paths_per_iteration=10
+    ):
+        """Explore with several /explore requests in flight at once
+
+        Each round generates num_workers independent path batches from the
+        current strategy and posts them concurrently — requests releases the
+        GIL during socket I/O, so the round-trips overlap. The observations
+        are then replayed serially so room_sequence_map and the identity
+        analysis update in a single thread.
+        """
+        if not self.current_strategy:
+            print("No exploration strategy set! Use set_strategy() first.")
+            return
+
+        iteration = 0
+        while (
+            iteration < max_iterations
+            and self.current_strategy.should_continue_exploring()
+        ):
+            print(f"\nIteration {iteration + 1}:")
+            batches = []
+            for _ in range(num_workers):
+                paths = self.current_strategy.generate_next_paths(
+                    max_paths_per_iteration
+                )
+                if paths:
+                    batches.append(paths)
+
+            if not batches:
+                print("No more paths to explore")
+                break
+
+            def post_batch(plans):
+                plan_strings = ["".join(str(door) for door in plan) for plan in plans]
+                return self._post_json(
+                    "explore", {"id": self.data.user_id, "plans": plan_strings}
+                )
+
+            print(f"Posting {len(batches)} batches in parallel")
+            with ThreadPoolExecutor(max_workers=num_workers) as pool:
+                responses = list(pool.map(post_batch, batches))
+
+            for plans, response in zip(batches, responses):
+                if response.status_code != 200:
+                    print(f"Explore failed: {response.status_code} {response.text}")
+                    continue
+                result = self._parse_json(response)
+                for plan, rooms_result in zip(plans, result.get("results", [])):
+                    self.add_observation(plan, rooms_result, defer_analysis=True)
+            self.analyzer.update_room_identities()
+
+            self.current_strategy.print_stats()
             iteration += 1
 
         print(f"\nExploration completed after {iteration} iterations")
@@ -167,11 +327,7 @@ class ModularProblem:
         print("Submitting guess")
 
         data = {"id": self.data.user_id, "map": map_data}
-        response = requests.post(
-            f"{self.data.base_url}/guess",
-            headers={"Content-Type": "application/json"},
-            json=data,
-        )
+        response = self._post_json("guess", data)
 
         print(f"Status: {response.status_code}")
         print(response.text)
@@ -186,16 +342,27 @@ class ModularProblem:
 
     def load_observations(self, filename):
         """Load observations from a JSON file and process them"""
-        with open(filename, "r") as f:
-            data = json.load(f)
+        # Saved files stay indented stdlib JSON for readability; parsing them
+        # back still benefits from orjson when it's installed
+        if orjson is not None:
+            with open(filename, "rb") as f:
+                data = orjson.loads(f.read())
+        else:
+            with open(filename, "r") as f:
+                data = json.load(f)
 
         for obs in data["observations"]:
-            self.add_observation(obs["path"], obs["rooms"])
+            self.add_observation(obs["path"], obs["rooms"], defer_analysis=True)
+        self.analyzer.update_room_identities()
 
     # Visualization
-    def generate_graphviz(self, filename, render_png=True, show_possibilities=True):
+    def generate_graphviz(
+        self, filename, render_png=True, show_possibilities=True, batch_png=False
+    ):
         """Generate graphviz visualization"""
-        self.visualizer.generate_graphviz(filename, render_png, show_possibilities)
+        self.visualizer.generate_graphviz(
+            filename, render_png, show_possibilities, batch_png
+        )
 
     def print_summary(self):
         """Print text summary of current state"""
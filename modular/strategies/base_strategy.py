@@ -23,24 +23,24 @@ class ExplorationStrategy(ABC):
         """Determine if exploration should continue"""
         pass
 
+    def filter_novel(self, paths):
+        """Drop candidate paths whose exact door sequence was already explored"""
+        explored = self.data.explored_paths
+        return [path for path in paths if tuple(path) not in explored]
+
     def get_unexplored_doors(self):
         """Get all doors that haven't been confirmed"""
-        unexplored = []
-        for room_id, room in self.data.rooms.items():
-            for door in range(6):
-                if not room.has_confirmed_connection(door):
-                    unexplored.append((room, door))
-        return unexplored
+        # ProblemData maintains this frontier incrementally: doors are added
+        # on room creation and discarded when confirmed
+        return list(self.data.unexplored_frontier)
 
     def get_exploration_stats(self):
         """Get statistics about current exploration state"""
-        total_doors = len(self.data.rooms) * 6
-        confirmed_doors = sum(
-            1
-            for room in self.data.rooms.values()
-            for door in range(6)
-            if room.has_confirmed_connection(door)
-        )
+        num_rooms = len(self.data.rooms)
+        total_doors = num_rooms * 6
+        # One array reduction over the SoA door table instead of a Python
+        # loop touching every Room
+        confirmed_doors = int((self.data.confirmed[:num_rooms] >= 0).sum())
 
         return {
             "total_rooms": len(self.data.rooms),
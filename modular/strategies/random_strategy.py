@@ -3,6 +3,9 @@ Random exploration strategies
 """
 
 import random
+
+import numpy as np
+
 from .base_strategy import ExplorationStrategy
 
 
@@ -13,15 +16,28 @@ class RandomWalkStrategy(ExplorationStrategy):
         super().__init__(problem_data, identity_analyzer)
         self.name = "RandomWalkStrategy"
         self.max_path_length = max_path_length
+        self._rng = np.random.default_rng()
 
-    def generate_next_paths(self, max_paths=10):
-        """Generate random paths of varying lengths"""
+    def generate_next_paths(self, max_paths=10, oversample=4):
+        """Generate random paths of varying lengths, skipping explored ones"""
         paths = []
-
-        for _ in range(max_paths):
-            length = random.randint(1, self.max_path_length)
-            path = [random.randint(0, 5) for _ in range(length)]
+        seen = set()
+
+        # One C-level draw for the whole candidate pool instead of a
+        # random.randint call per digit
+        count = max_paths * oversample
+        lengths = self._rng.integers(1, self.max_path_length + 1, size=count)
+        doors = self._rng.integers(0, 6, size=(count, self.max_path_length))
+
+        for i in range(count):
+            path = doors[i, : lengths[i]].tolist()
+            key = tuple(path)
+            if key in seen or key in self.data.explored_paths:
+                continue
+            seen.add(key)
             paths.append(path)
+            if len(paths) >= max_paths:
+                break
 
         return paths
 
@@ -44,30 +60,54 @@ class BiasedRandomStrategy(ExplorationStrategy):
         super().__init__(problem_data, identity_analyzer)
         self.name = "BiasedRandomStrategy"
         self.bias_strength = bias_strength  # 0-1, higher = more bias toward unexplored
-
-    def generate_next_paths(self, max_paths=10):
+        self._rng = np.random.default_rng()
+        # Shared fallback for when nothing is unexplored, instead of
+        # constructing a fresh strategy object on every call
+        self._fallback = RandomWalkStrategy(
+            problem_data, identity_analyzer, max_path_length=4
+        )
+
+    def generate_next_paths(self, max_paths=10, oversample=4):
         """Generate random paths biased toward unexplored doors"""
         paths = []
+        seen = set()
         unexplored = self.get_unexplored_doors()
 
         if not unexplored:
             # Fall back to pure random if nothing unexplored
-            return RandomWalkStrategy(self.data, self.analyzer).generate_next_paths(
-                max_paths
-            )
-
-        for _ in range(max_paths):
-            if random.random() < self.bias_strength and unexplored:
+            return self._fallback.generate_next_paths(max_paths)
+
+        # One scan per call: cache the shortest known prefix per room, and
+        # weight candidates toward doors that are cheap to reach so request
+        # payloads stay short
+        prefix_cache = {}
+        for room, _ in unexplored:
+            if room not in prefix_cache:
+                prefix_cache[room] = self._find_short_path_to_room(room)
+        weights = [1.0 / (len(prefix_cache[room]) + 1) for room, _ in unexplored]
+
+        # Pre-draw the whole pool of randomness in three C-level calls
+        count = max_paths * oversample
+        bias_draws = self._rng.random(count)
+        rand_lengths = self._rng.integers(1, 5, size=count)
+        rand_doors = self._rng.integers(0, 6, size=(count, 4))
+
+        for i in range(count):
+            if bias_draws[i] < self.bias_strength:
                 # Biased toward unexplored door
-                room, door = random.choice(unexplored)
-                path_to_room = self._find_short_path_to_room(room)
-                path = path_to_room + [door]
+                room, door = random.choices(unexplored, weights=weights)[0]
+                path = prefix_cache[room] + [door]
             else:
                 # Pure random path
-                length = random.randint(1, 4)
-                path = [random.randint(0, 5) for _ in range(length)]
+                path = rand_doors[i, : rand_lengths[i]].tolist()
 
+            key = tuple(path)
+            if key in seen or key in self.data.explored_paths:
+                continue
+            seen.add(key)
             paths.append(path)
+            if len(paths) >= max_paths:
+                break
 
         return paths
 
@@ -98,23 +138,21 @@ class AdaptiveStrategy(ExplorationStrategy):
         ]
         self.current_strategy_index = 0
         self.switch_threshold = 20  # Switch after this many explorations
+        self.exploration_count = 0
 
     def generate_next_paths(self, max_paths=10):
         """Generate paths using current strategy"""
         current_strategy = self.strategies[self.current_strategy_index]
 
         # Switch strategies periodically
-        if hasattr(self, "exploration_count"):
-            self.exploration_count += 1
-            if self.exploration_count >= self.switch_threshold:
-                self.current_strategy_index = (self.current_strategy_index + 1) % len(
-                    self.strategies
-                )
-                self.exploration_count = 0
-                current_strategy = self.strategies[self.current_strategy_index]
-                print(f"  Switching to {current_strategy.name}")
-        else:
+        self.exploration_count += 1
+        if self.exploration_count >= self.switch_threshold:
+            self.current_strategy_index = (self.current_strategy_index + 1) % len(
+                self.strategies
+            )
             self.exploration_count = 0
+            current_strategy = self.strategies[self.current_strategy_index]
+            print(f"  Switching to {current_strategy.name}")
 
         return current_strategy.generate_next_paths(max_paths)
 
@@ -2,6 +2,8 @@
 Systematic exploration strategy - explores all paths up to a certain depth
 """
 
+from itertools import product
+
 from .base_strategy import ExplorationStrategy
 
 
@@ -26,33 +28,30 @@ class SystematicStrategy(ExplorationStrategy):
         paths = []
         explored_set = self.explored_at_depth[self.current_depth]
 
-        # Generate all combinations for current depth
-        def generate_paths(current_path, remaining_depth):
-            if remaining_depth == 0:
-                path_tuple = tuple(current_path)
-                if path_tuple not in explored_set:
-                    paths.append(current_path[:])
-                    explored_set.add(path_tuple)
-                return
-
-            for door in range(6):
-                current_path.append(door)
-                generate_paths(current_path, remaining_depth - 1)
-                current_path.pop()
-
-        generate_paths([], self.current_depth)
+        # Enumerate all door combinations for the current depth with the
+        # C-level Cartesian product, stopping early once max_paths are found
+        for path_tuple in product(range(6), repeat=self.current_depth):
+            if path_tuple not in explored_set:
+                paths.append(list(path_tuple))
+                explored_set.add(path_tuple)
+                if max_paths and len(paths) >= max_paths:
+                    break
 
         # If we've exhausted current depth, move to next
         if not paths:
             self.current_depth += 1
             return self.generate_next_paths(max_paths)
 
-        # Limit paths if requested
-        if max_paths and len(paths) > max_paths:
-            paths = paths[:max_paths]
-
         return paths
 
+    def generate_sibling_batch(self, prefix):
+        """All six one-door extensions of a prefix, for a single fan-out call
+
+        The resulting plans share their prefix, which the server answers in
+        one request and add_observation processes without re-walking it.
+        """
+        return [list(prefix) + [door] for door in range(6)]
+
     def should_continue_exploring(self):
         """Continue until max depth reached or all doors confirmed"""
         if self.current_depth > self.max_depth:
@@ -79,13 +78,16 @@ class TreeExplorationStrategy(ExplorationStrategy):
         paths = []
 
         # For each unexplored door, create a path to it
-        for room, door in unexplored[:max_paths]:
+        for room, door in unexplored:
+            if len(paths) >= max_paths:
+                break
             # Find a path to this room
             path_to_room = self._find_path_to_room(room)
             if path_to_room is not None:
-                # Extend with the unexplored door
+                # Extend with the unexplored door, unless already explored
                 full_path = path_to_room + [door]
-                paths.append(full_path)
+                if tuple(full_path) not in self.data.explored_paths:
+                    paths.append(full_path)
 
         return paths
 
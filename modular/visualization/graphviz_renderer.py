@@ -2,99 +2,225 @@
 Graphviz visualization for room maps
 """
 
+import hashlib
+import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+# DOT line templates, built once so each node/edge emission reuses the
+# parsed format instead of re-parsing an f-string per entry
+_MERGED_NODE_TPL = (
+    '  "{rid}" [label="Merged Room\\nLabel: {lbl}{paths}{ids}'
+    '\\nContains: {members}" fillcolor=lightblue style=filled];\n'
+)
+_NODE_TPL = '  "{rid}" [label="Room {ri}\\nLabel: {lbl}{ids}{drs}"{color}];\n'
+_CONFIRMED_EDGE_TPL = '  "{src}" -> "{dst}" [label="door {door}" color=black];\n'
+_POSSIBLE_EDGE_TPL = (
+    '  "{src}" -> "{dst}" [label="door {door}?" style=dashed color=gray];\n'
+)
+
+
+class DisjointSet:
+    """Union-find over Room objects, with path halving and union by rank"""
+
+    def __init__(self):
+        self.parent = {}
+        self.rank = {}
+
+    def find(self, x):
+        parent = self.parent
+        if x not in parent:
+            parent[x] = x
+            self.rank[x] = 0
+            return x
+        while parent[x] is not x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, x, y):
+        root_x = self.find(x)
+        root_y = self.find(y)
+        if root_x is root_y:
+            return
+        if self.rank[root_x] < self.rank[root_y]:
+            root_x, root_y = root_y, root_x
+        self.parent[root_y] = root_x
+        if self.rank[root_x] == self.rank[root_y]:
+            self.rank[root_x] += 1
 
 
 class GraphvizRenderer:
     """Renders room maps using Graphviz"""
 
+    # .dot files queued for PNG rendering; flush_batch() renders them all
+    # with one dot invocation, paying process startup once instead of per file
+    _pending_dot_files = []
+    # dot_filename -> content digest of the last successful render, so
+    # iterative runs skip shelling out when the diagram hasn't changed
+    _rendered_digests = {}
+
     def __init__(self, problem_data, identity_analyzer):
         self.data = problem_data
         self.analyzer = identity_analyzer
+        self._room_id_cache = {}  # room -> id string, rebuilt per render
+        self._display_id = {}  # room -> display id string, rebuilt per render
+        self._door_dests = {}  # room -> [destination or None] * 6, rebuilt per render
+        self._active_doors = {}  # room -> doors that can emit an edge, per render
+        self._rep_idx = {}  # room -> representative's room_index, rebuilt per render
+
+    def generate_graphviz(
+        self, filename, render_png=True, show_possibilities=True, batch_png=False
+    ):
+        """Generate a Graphviz diagram of the mapped rooms
 
-    def generate_graphviz(self, filename, render_png=True, show_possibilities=True):
-        """Generate a Graphviz diagram of the mapped rooms"""
+        With batch_png=True the PNG render is queued instead of run
+        immediately; call GraphvizRenderer.flush_batch() once at the end of
+        the pipeline to render every queued diagram in a single dot call.
+        """
         dot_filename = filename if filename.endswith(".dot") else f"{filename}.dot"
 
         # Find definite merges to represent as single nodes
         definite_merges = self.analyzer.find_definite_merges()
         merged_rooms = set()
-        room_groups = self._create_room_groups(definite_merges, merged_rooms)
-
-        with open(dot_filename, "w") as f:
-            f.write("digraph rooms {\n")
-            f.write("  rankdir=LR;\n")
-            f.write("  node [shape=box];\n")
 
-            # Write nodes for merged groups
-            self._write_merged_nodes(f, room_groups)
-
-            # Write nodes for unmerged rooms
-            self._write_individual_nodes(f, merged_rooms)
+        # Compose each room's id string once; the node and edge writers index
+        # this dict instead of re-calling get_room_id per use
+        self._room_id_cache = {
+            room: self.data.get_room_id(room) for room in self.data.rooms
+        }
+
+        if definite_merges:
+            room_groups = self._create_room_groups(definite_merges, merged_rooms)
+
+            # One pass materializes every room's display id from its
+            # union-find representative, so edge emission is a plain dict index
+            rep_map = {
+                room: rep for rep, members in room_groups.items() for room in members
+            }
+            self._display_id = {
+                room: self._room_id_cache[rep_map.get(room, room)]
+                for room in self.data.rooms
+            }
+
+            # Representative index per room for packed edge-dedup keys; two
+            # rooms drawn as the same merged node share an index, mirroring
+            # the display id they render under
+            self._rep_idx = {
+                room: rep_map.get(room, room).room_index for room in self.data.rooms
+            }
+        else:
+            # No confirmed merges - the common case early in a run - so every
+            # room represents itself and the union-find plumbing is skipped
+            room_groups = {}
+            self._display_id = dict(self._room_id_cache)
+            self._rep_idx = {room: room.room_index for room in self.data.rooms}
+
+        # Snapshot each room's six destinations with one SoA row read, so the
+        # edge loop doesn't make a per-door get_door_destination call, and
+        # note which doors can emit an edge at all - in partially explored
+        # maps most (room, door) slots produce nothing
+        rooms = self.data.rooms
+        confirmed = self.data.confirmed
+        self._door_dests = {}
+        self._active_doors = {}
+        for room in rooms:
+            dests = [
+                rooms[dest] if dest >= 0 else None
+                for dest in confirmed[room.room_index].tolist()
+            ]
+            self._door_dests[room] = dests
+            self._active_doors[room] = [
+                door
+                for door in range(6)
+                if dests[door] is not None or len(room.door_possibilities[door]) > 1
+            ]
+
+        # Accumulate the document in memory and write it in one call rather
+        # than one buffered write per node and edge
+        parts = ["digraph rooms {\n", "  rankdir=LR;\n", "  node [shape=box];\n"]
+
+        # Write nodes for merged groups
+        self._write_merged_nodes(parts, room_groups)
+
+        # Write nodes for unmerged rooms
+        self._write_individual_nodes(parts, merged_rooms)
+
+        # Write edges (door connections)
+        self._write_edges(parts, show_possibilities)
+
+        parts.append("}\n")
+        dot_text = "".join(parts)
 
-            # Write edges (door connections)
-            self._write_edges(f, room_groups, merged_rooms, show_possibilities)
+        with open(dot_filename, "w") as f:
+            f.write(dot_text)
 
-            f.write("}\n")
+        digest = hashlib.blake2b(dot_text.encode(), digest_size=16).hexdigest()
 
-        if render_png:
-            self._render_png(dot_filename)
+        if render_png and batch_png:
+            if self._rendered_digests.get(dot_filename) == digest and os.path.exists(
+                f"{dot_filename}.png"
+            ):
+                print(f"Generated {dot_filename} (PNG unchanged, render skipped)")
+            else:
+                self._pending_dot_files.append(dot_filename)
+                self._rendered_digests[dot_filename] = digest
+                print(f"Generated {dot_filename} (PNG render queued)")
+        elif render_png:
+            png_filename = dot_filename.replace(".dot", ".png")
+            if self._rendered_digests.get(dot_filename) == digest and os.path.exists(
+                png_filename
+            ):
+                print(f"Generated {dot_filename} (PNG unchanged, render skipped)")
+            elif self._render_png(dot_filename):
+                self._rendered_digests[dot_filename] = digest
         else:
             print(f"Generated {dot_filename}")
 
     def _create_room_groups(self, definite_merges, merged_rooms):
         """Create groups of rooms that should be merged"""
-        room_groups = {}
-
+        # Union-find makes each merge near O(1) instead of scanning every
+        # existing group per pair
+        dsu = DisjointSet()
         for room1, room2 in definite_merges:
-            # Find which group each room belongs to (if any)
-            group1 = next((k for k, v in room_groups.items() if room1 in v), room1)
-            group2 = next((k for k, v in room_groups.items() if room2 in v), room2)
-
-            if group1 == group2:
-                continue  # Already in same group
-
-            # Merge groups or create new group
-            if group1 in room_groups and group2 in room_groups:
-                # Merge two existing groups
-                room_groups[group1].extend(room_groups[group2])
-                del room_groups[group2]
-                merged_rooms.update(room_groups[group1])
-            elif group1 in room_groups:
-                room_groups[group1].append(room2)
-                merged_rooms.add(room2)
-            elif group2 in room_groups:
-                room_groups[group2].append(room1)
-                merged_rooms.add(room1)
-            else:
-                # Create new group
-                room_groups[group1] = [room1, room2]
-                merged_rooms.update([room1, room2])
+            dsu.union(room1, room2)
+
+        room_groups = {}
+        for room in dsu.parent:
+            room_groups.setdefault(dsu.find(room), []).append(room)
+        merged_rooms.update(dsu.parent)
 
         return room_groups
 
-    def _write_merged_nodes(self, f, room_groups):
+    def _write_merged_nodes(self, parts, room_groups):
         """Write nodes for merged room groups"""
         for representative, room_list in room_groups.items():
-            room_ids = [self.data.get_room_id(r) for r in room_list]
+            room_ids = [self._room_id_cache[r] for r in room_list]
             paths_info = f"\\nPaths: {len(representative.paths)}"
             identities_info = (
-                f"\\nPossible IDs: {len(representative.possible_identities)}"
+                f"\\nPossible IDs: {representative.possible_identities.bit_count()}"
             )
 
-            f.write(
-                f'  "{self.data.get_room_id(representative)}" [label="Merged Room\\nLabel: {representative.label}{paths_info}{identities_info}\\nContains: {", ".join(room_ids)}" fillcolor=lightblue style=filled];\n'
+            parts.append(
+                _MERGED_NODE_TPL.format(
+                    rid=self._room_id_cache[representative],
+                    lbl=representative.label,
+                    paths=paths_info,
+                    ids=identities_info,
+                    members=", ".join(room_ids),
+                )
             )
 
-    def _write_individual_nodes(self, f, merged_rooms):
+    def _write_individual_nodes(self, parts, merged_rooms):
         """Write nodes for individual (unmerged) rooms"""
-        for room_id, room in self.data.rooms.items():
+        for room in self.data.rooms:
+            room_id = self._room_id_cache[room]
             if room not in merged_rooms:
                 color = self._get_room_color(room)
 
                 identities_info = (
-                    f"\\nPossible IDs: {len(room.possible_identities)}"
-                    if len(room.possible_identities) > 0
+                    f"\\nPossible IDs: {room.possible_identities.bit_count()}"
+                    if room.possible_identities != 0
                     else ""
                 )
 
@@ -105,107 +231,139 @@ class GraphvizRenderer:
                     else ""
                 )
 
-                f.write(
-                    f'  "{room_id}" [label="Room {room.room_index}\\nLabel: {room.label}{identities_info}{doors_info}"{color}];\n'
+                parts.append(
+                    _NODE_TPL.format(
+                        rid=room_id,
+                        ri=room.room_index,
+                        lbl=room.label,
+                        ids=identities_info,
+                        drs=doors_info,
+                        color=color,
+                    )
                 )
 
     def _get_room_color(self, room):
         """Get color for room node based on its status"""
         if room.confirmed_unique:
             return " fillcolor=lightgreen style=filled"
-        elif len(room.possible_identities) > 0:
+        elif room.possible_identities != 0:
             return " fillcolor=lightyellow style=filled"
         else:
             return ""
 
-    def _write_edges(self, f, room_groups, merged_rooms, show_possibilities):
+    def _write_edges(self, parts, show_possibilities):
         """Write edges showing door connections"""
         drawn_edges = set()
 
-        for room_id, room in self.data.rooms.items():
-            source_id = self._get_display_id(room, room_id, room_groups, merged_rooms)
+        for room in self.data.rooms:
+            source_id = self._get_display_id(room)
 
-            for door in range(6):
+            for door in self._active_doors[room]:
                 self._write_door_edges(
-                    f,
+                    parts,
                     room,
                     door,
                     source_id,
-                    room_groups,
-                    merged_rooms,
                     drawn_edges,
                     show_possibilities,
                 )
 
-    def _get_display_id(self, room, room_id, room_groups, merged_rooms):
+    def _get_display_id(self, room):
         """Get the display ID for a room (might be merged representative)"""
-        if room in merged_rooms:
-            representative = next(k for k, v in room_groups.items() if room in v)
-            return self.data.get_room_id(representative)
-        return room_id
+        return self._display_id[room]
 
     def _write_door_edges(
         self,
-        f,
+        parts,
         room,
         door,
         source_id,
-        room_groups,
-        merged_rooms,
         drawn_edges,
         show_possibilities,
     ):
         """Write edges for a specific door"""
-        confirmed_dest = room.get_door_destination(door)
-        possibilities = room.get_door_possibilities(door)
+        confirmed_dest = self._door_dests[room][door]
+        possibilities = room.door_possibilities[door]
+
+        # Dedup keys pack (source rep, target rep, door) into one int - far
+        # cheaper to hash than a tuple of display-id strings
+        source_key = self._rep_idx[room] << 19 | door
 
         if confirmed_dest is not None:
             # Draw confirmed connection with solid line
-            target_id = self._get_display_id(
-                confirmed_dest,
-                self.data.get_room_id(confirmed_dest),
-                room_groups,
-                merged_rooms,
-            )
+            target_id = self._get_display_id(confirmed_dest)
 
-            edge_key = (source_id, target_id, door)
+            edge_key = source_key | self._rep_idx[confirmed_dest] << 3
             if edge_key not in drawn_edges:
-                f.write(
-                    f'  "{source_id}" -> "{target_id}" [label="door {door}" color=black];\n'
+                parts.append(
+                    _CONFIRMED_EDGE_TPL.format(src=source_id, dst=target_id, door=door)
                 )
                 drawn_edges.add(edge_key)
 
         elif show_possibilities and len(possibilities) > 1:
             # Draw multiple possibilities with dashed lines
             for possible_dest in possibilities:
-                target_id = self._get_display_id(
-                    possible_dest,
-                    self.data.get_room_id(possible_dest),
-                    room_groups,
-                    merged_rooms,
-                )
+                target_id = self._get_display_id(possible_dest)
 
-                edge_key = (source_id, target_id, door)
+                edge_key = source_key | self._rep_idx[possible_dest] << 3
                 if edge_key not in drawn_edges:
-                    f.write(
-                        f'  "{source_id}" -> "{target_id}" [label="door {door}?" style=dashed color=gray];\n'
+                    parts.append(
+                        _POSSIBLE_EDGE_TPL.format(
+                            src=source_id, dst=target_id, door=door
+                        )
                     )
                     drawn_edges.add(edge_key)
 
+    @classmethod
+    def flush_batch(cls):
+        """Render every queued .dot file with a single dot invocation
+
+        dot's -O flag auto-names each output (map.dot -> map.dot.png), so
+        one process start covers the whole queue.
+        """
+        queued, cls._pending_dot_files = cls._pending_dot_files, []
+        if not queued:
+            return
+
+        # dot is single-threaded, so large queues are sharded across one
+        # process per core; threads suffice since the parent only waits
+        workers = min(os.cpu_count() or 1, len(queued))
+        if len(queued) <= 2 or workers == 1:
+            chunks = [queued]
+        else:
+            chunks = [queued[i::workers] for i in range(workers)]
+
+        def render(chunk):
+            subprocess.run(["dot", "-Tpng", "-O", *chunk], check=True)
+
+        try:
+            if len(chunks) == 1:
+                render(chunks[0])
+            else:
+                with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+                    list(pool.map(render, chunks))
+            print(f"Rendered {len(queued)} queued diagram(s)")
+        except subprocess.CalledProcessError:
+            print(f"dot command failed for {len(queued)} queued file(s)")
+        except FileNotFoundError:
+            print(f"dot command not found; skipped {len(queued)} queued file(s)")
+
     def _render_png(self, dot_filename):
-        """Render PNG from DOT file"""
+        """Render PNG from DOT file; returns True on success"""
         png_filename = dot_filename.replace(".dot", ".png")
         try:
             subprocess.run(
                 ["dot", "-Tpng", dot_filename, "-o", png_filename], check=True
             )
             print(f"Generated {dot_filename} and {png_filename}")
+            return True
         except subprocess.CalledProcessError:
             print(f"Generated {dot_filename} (dot command failed for PNG generation)")
         except FileNotFoundError:
             print(
                 f"Generated {dot_filename} (dot command not found for PNG generation)"
             )
+        return False
 
 
 class TextRenderer:
@@ -220,7 +378,8 @@ class TextRenderer:
         print(f"\nRoom Map Summary ({len(self.data.rooms)} rooms):")
         print("=" * 50)
 
-        for room_id, room in self.data.rooms.items():
+        for room in self.data.rooms:
+            room_id = self.data.get_room_id(room)
             self._print_room_details(room_id, room)
 
         self._print_identity_summary()
@@ -230,7 +389,7 @@ class TextRenderer:
         status = (
             "UNIQUE"
             if room.confirmed_unique
-            else f"AMBIGUOUS({len(room.possible_identities)})"
+            else f"AMBIGUOUS({room.possible_identities.bit_count()})"
         )
         print(f"\n{room_id}: Label {room.label} [{status}]")
 
@@ -1,9 +1,53 @@
 import json
 import subprocess
+from itertools import product
+
 import requests
+
+try:
+    import orjson  # much faster observation (de)serialization
+except ImportError:
+    orjson = None
 from room import Room
 from visualizer import TerminalVisualizer
 
+# Expands a 6-bit known-door mask to 2 bits per door, so packed
+# door-label words can be compared with a single AND/XOR
+_WIDE_MASK = [sum(3 << 2 * b for b in range(6) if m >> b & 1) for m in range(64)]
+
+# Maps door ints 0-5 to their ASCII digits for plan serialization
+_DOOR_TRANS = bytes.maketrans(bytes(range(6)), b"012345")
+
+
+class DisjointSet:
+    """Union-find over Room objects, with path halving and union by rank"""
+
+    def __init__(self):
+        self.parent = {}
+        self.rank = {}
+
+    def find(self, x):
+        parent = self.parent
+        if x not in parent:
+            parent[x] = x
+            self.rank[x] = 0
+            return x
+        while parent[x] is not x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, x, y):
+        root_x = self.find(x)
+        root_y = self.find(y)
+        if root_x is root_y:
+            return
+        if self.rank[root_x] < self.rank[root_y]:
+            root_x, root_y = root_y, root_x
+        self.parent[root_y] = root_x
+        if self.rank[root_x] == self.rank[root_y]:
+            self.rank[root_x] += 1
+
 
 class Problem:
     def __init__(
@@ -11,12 +55,23 @@ class Problem:
     ):
         self.num_rooms = room_count  # number of rooms in the problem
         self.final_room = None  # instance of the final room we need to reach
-        self.rooms = {}  # dictionary of room instances, keyed by unique identifier
+        self.rooms = []  # room instances, indexed by room_index
+        self.rooms_by_label = {}  # label -> list of rooms, inverted index
+        self._dirty_rooms = set()  # rooms whose doors changed since last identity pass
         self.next_room_id = 0  # counter for assigning unique room IDs
         self.observations = []  # store all observations for saving
-        self.room_sequence_map = {}  # maps (path_prefix, room_labels) to room instances
+        self.room_sequence_map = {}  # maps prefix-trie node ids to room instances
+        # Prefix trie over (parent node, door, label) edges. Walking an
+        # observation advances one node per step, so sequence keys are small
+        # int ids instead of O(length) tuple slices rebuilt per step.
+        self.prefix_trie = {}
+        self.next_trie_node = 1  # node 0 is the virtual root
         self.user_id = user_id  # API user ID
         self.base_url = "https://31pwr5t6ij.execute-api.eu-west-2.amazonaws.com"
+        # Keep-alive session so repeated API calls reuse one TLS connection
+        # instead of handshaking per request
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
         self.visualizer = TerminalVisualizer(self)  # Terminal visualization
 
     def add_observation(self, path, rooms):
@@ -28,19 +83,32 @@ class Problem:
         if len(rooms) != len(path) + 1:
             raise ValueError("rooms list should have one more element than path")
 
-        # Store the observation
+        # Doors and labels form a tiny int alphabet; normalize once so every
+        # trie edge, dict key and label comparison downstream hashes small
+        # ints even when observations come from hand-edited JSON with
+        # string digits
+        path = [int(door) for door in path]
+        rooms = [int(label) for label in rooms]
+
+        # Store the observation once; rooms reference it by index instead of
+        # each holding their own copy of the path and label lists
         self.observations.append({"path": path, "rooms": rooms})
+        obs_idx = len(self.observations) - 1
 
         # Process incrementally: for each step in the path
         current_room = self.get_or_create_starting_room(rooms[0])
+        current_room.paths.append((obs_idx, 0))
+        node = self.trie_child(0, -1, rooms[0])
 
         for i, door in enumerate(path):
             destination_label = rooms[i + 1]
+            node = self.trie_child(node, door, destination_label)
 
             # Find or create destination room possibilities
             destination_room = self.process_door_destination(
-                current_room, door, destination_label, path[: i + 1], rooms[: i + 2]
+                current_room, door, destination_label, node
             )
+            destination_room.paths.append((obs_idx, i + 1))
 
             # Move to the destination for next iteration
             current_room = destination_room
@@ -48,42 +116,56 @@ class Problem:
         # Update room identity tracking after new observation
         self.update_room_identities()
 
+    def trie_child(self, parent_node, door, label):
+        """Get or create the trie node extending parent_node by (door, label)"""
+        edge = (parent_node, door, label)
+        node = self.prefix_trie.get(edge)
+        if node is None:
+            node = self.next_trie_node
+            self.next_trie_node += 1
+            self.prefix_trie[edge] = node
+        return node
+
     def get_or_create_starting_room(self, label):
         """Get or create the starting room with given label"""
-        sequence_key = ((), (label,))  # Empty path, just the starting room
+        sequence_key = self.trie_child(0, -1, label)  # root edge, no door taken
 
         if sequence_key in self.room_sequence_map:
             return self.room_sequence_map[sequence_key]
         else:
             room = Room(room_index=self.next_room_id, label=label)
-            room_id = f"{self.next_room_id}_{label}"
-            self.rooms[room_id] = room
+            self.rooms.append(room)
+            self.rooms_by_label.setdefault(label, []).append(room)
             self.room_sequence_map[sequence_key] = room
+            self._dirty_rooms.add(room)
             self.next_room_id += 1
             return room
 
     def process_door_destination(
-        self, from_room, door, destination_label, path_so_far, rooms_so_far
+        self, from_room, door, destination_label, sequence_key
     ):
-        """Process a door leading to a room with destination_label"""
-        sequence_key = (tuple(path_so_far), tuple(rooms_so_far))
+        """Process a door leading to a room with destination_label
 
+        sequence_key is the prefix-trie node id for the exact (path, room
+        labels) sequence ending at this door.
+        """
         # Check if we've seen this exact sequence before
         if sequence_key in self.room_sequence_map:
             destination_room = self.room_sequence_map[sequence_key]
             from_room.confirm_door_destination(door, destination_room)
+            self._dirty_rooms.add(from_room)
             return destination_room
 
-        # Find all existing rooms with the destination label as possibilities
-        possible_destinations = []
-        for room in self.rooms.values():
-            if room.label == destination_label:
-                possible_destinations.append(room)
+        # All existing rooms with the destination label are possibilities;
+        # copy the index bucket since the new room joins it below
+        possible_destinations = list(
+            self.rooms_by_label.get(destination_label, ())
+        )
 
         # Create a new room as another possibility
         new_room = Room(room_index=self.next_room_id, label=destination_label)
-        room_id = f"{self.next_room_id}_{destination_label}"
-        self.rooms[room_id] = new_room
+        self.rooms.append(new_room)
+        self.rooms_by_label.setdefault(destination_label, []).append(new_room)
         self.room_sequence_map[sequence_key] = new_room
         self.next_room_id += 1
 
@@ -94,6 +176,8 @@ class Problem:
 
         # For this specific path, confirm it leads to the new room
         from_room.confirm_door_destination(door, new_room)
+        self._dirty_rooms.add(from_room)
+        self._dirty_rooms.add(new_room)
 
         # Mark all same-label rooms as potentially identical
         for room in possible_destinations:
@@ -105,138 +189,147 @@ class Problem:
     def save_observations(self, filename):
         """Save all observations to a JSON file"""
         data = {"observations": self.observations}
-        with open(filename, "w") as f:
-            json.dump(data, f, indent=2)
+        if orjson is not None:
+            with open(filename, "wb") as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(filename, "w") as f:
+                json.dump(data, f, indent=2)
 
     def load_observations(self, filename):
         """Load observations from a JSON file and process them"""
-        with open(filename, "r") as f:
-            data = json.load(f)
+        if orjson is not None:
+            with open(filename, "rb") as f:
+                data = orjson.loads(f.read())
+        else:
+            with open(filename, "r") as f:
+                data = json.load(f)
 
         for obs in data["observations"]:
             self.add_observation(obs["path"], obs["rooms"])
 
+    def append_observation_log(self, filename, path, rooms):
+        """Append one observation to a newline-delimited JSON log
+
+        O(1) per observation, unlike save_observations which rewrites the
+        whole history; read it back with load_observation_log.
+        """
+        record = {"path": path, "rooms": rooms}
+        line = orjson.dumps(record) if orjson is not None else json.dumps(record).encode()
+        with open(filename, "ab") as f:
+            f.write(line + b"\n")
+
+    def load_observation_log(self, filename):
+        """Load and replay observations from a newline-delimited JSON log"""
+        loads = orjson.loads if orjson is not None else json.loads
+        with open(filename, "rb") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    record = loads(line)
+                    self.add_observation(record["path"], record["rooms"])
+
     def generate_graphviz(self, filename, render_png=True):
         """Generate a Graphviz diagram of the mapped rooms"""
         dot_filename = filename if filename.endswith(".dot") else f"{filename}.dot"
 
-        # Find definite merges to represent as single nodes
-        definite_merges = self.find_definite_merges()
-        merged_rooms = set()
+        # Find definite merges to represent as single nodes; union-find
+        # makes each merge near O(1) instead of re-merging group lists
+        dsu = DisjointSet()
+        for room1, room2 in self.find_definite_merges():
+            dsu.union(room1, room2)
+
+        # Bucket rooms by representative in one linear pass
         room_groups = {}  # Maps representative room to list of all rooms in group
+        for room in dsu.parent:
+            room_groups.setdefault(dsu.find(room), []).append(room)
+        merged_rooms = set(dsu.parent)
+
+        # Maps each merged room to its group representative so edge
+        # emission is an O(1) lookup
+        rep_of = {
+            room: rep for rep, members in room_groups.items() for room in members
+        }
+
+        # Accumulate the document in memory and write it in one call rather
+        # than one buffered write per node and edge
+        parts = ["digraph rooms {\n", "  rankdir=LR;\n", "  node [shape=box];\n"]
+        append = parts.append
+
+        # Write nodes for merged groups
+        for representative, room_list in room_groups.items():
+            room_ids = [self.get_room_id(r) for r in room_list]
+            paths_info = f"\\nPaths: {len(representative.paths)}"
+            identities_info = (
+                f"\\nPossible IDs: {len(representative.possible_identities)}"
+            )
 
-        # Process merges to create room groups
-        for room1, room2 in definite_merges:
-            # Find which group each room belongs to (if any)
-            group1 = next((k for k, v in room_groups.items() if room1 in v), room1)
-            group2 = next((k for k, v in room_groups.items() if room2 in v), room2)
-
-            if group1 == group2:
-                continue  # Already in same group
-
-            # Merge groups or create new group
-            if group1 in room_groups and group2 in room_groups:
-                # Merge two existing groups
-                room_groups[group1].extend(room_groups[group2])
-                del room_groups[group2]
-                merged_rooms.update(room_groups[group1])
-            elif group1 in room_groups:
-                room_groups[group1].append(room2)
-                merged_rooms.add(room2)
-            elif group2 in room_groups:
-                room_groups[group2].append(room1)
-                merged_rooms.add(room1)
-            else:
-                # Create new group
-                room_groups[room1] = [room1, room2]
-                merged_rooms.update([room1, room2])
+            append(
+                f'  "{self.get_room_id(representative)}" [label="Merged Room\\nLabel: {representative.label}{paths_info}{identities_info}\\nContains: {", ".join(room_ids)}" fillcolor=lightblue style=filled];\n'
+            )
+
+        # Write nodes for unmerged rooms
+        for room in self.rooms:
+            room_id = self.get_room_id(room)
+            if room not in merged_rooms:
+                color = ""
+                if room.confirmed_unique:
+                    color = " fillcolor=lightgreen style=filled"
+                elif len(room.possible_identities) > 0:
+                    color = " fillcolor=lightyellow style=filled"
 
-        with open(dot_filename, "w") as f:
-            f.write("digraph rooms {\n")
-            f.write("  rankdir=LR;\n")
-            f.write("  node [shape=box];\n")
-
-            # Write nodes for merged groups
-            for representative, room_list in room_groups.items():
-                room_ids = [self.get_room_id(r) for r in room_list]
-                paths_info = f"\\nPaths: {len(representative.paths)}"
                 identities_info = (
-                    f"\\nPossible IDs: {len(representative.possible_identities)}"
+                    f"\\nPossible IDs: {len(room.possible_identities)}"
+                    if len(room.possible_identities) > 0
+                    else ""
                 )
-
-                f.write(
-                    f'  "{self.get_room_id(representative)}" [label="Merged Room\\nLabel: {representative.label}{paths_info}{identities_info}\\nContains: {", ".join(room_ids)}" fillcolor=lightblue style=filled];\n'
+                append(
+                    f'  "{room_id}" [label="Room {room.room_index}\\nLabel: {room.label}{identities_info}"{color}];\n'
                 )
 
-            # Write nodes for unmerged rooms
-            for room_id, room in self.rooms.items():
-                if room not in merged_rooms:
-                    color = ""
-                    if room.confirmed_unique:
-                        color = " fillcolor=lightgreen style=filled"
-                    elif len(room.possible_identities) > 0:
-                        color = " fillcolor=lightyellow style=filled"
-
-                    identities_info = (
-                        f"\\nPossible IDs: {len(room.possible_identities)}"
-                        if len(room.possible_identities) > 0
-                        else ""
-                    )
-                    f.write(
-                        f'  "{room_id}" [label="Room {room.room_index}\\nLabel: {room.label}{identities_info}"{color}];\n'
+        # Write edges (door connections)
+        drawn_edges = set()
+        for room in self.rooms:
+            # Use representative if this room is merged
+            source_id = self.get_room_id(rep_of.get(room, room))
+            door_confirmed = room.door_confirmed
+            door_possibilities = room.door_possibilities
+
+            for door in range(6):
+                confirmed_dest = door_confirmed[door]
+                possibilities = door_possibilities[door]
+
+                if confirmed_dest is not None:
+                    # Draw confirmed connection with solid line
+                    target_id = self.get_room_id(
+                        rep_of.get(confirmed_dest, confirmed_dest)
                     )
 
-            # Write edges (door connections)
-            drawn_edges = set()
-            for room_id, room in self.rooms.items():
-                # Use representative if this room is merged
-                source_id = room_id
-                if room in merged_rooms:
-                    representative = next(
-                        k for k, v in room_groups.items() if room in v
-                    )
-                    source_id = self.get_room_id(representative)
-
-                for door in range(6):
-                    confirmed_dest = room.get_door_destination(door)
-                    possibilities = room.get_door_possibilities(door)
-
-                    if confirmed_dest is not None:
-                        # Draw confirmed connection with solid line
-                        target_id = self.get_room_id(confirmed_dest)
-                        if confirmed_dest in merged_rooms:
-                            representative = next(
-                                k for k, v in room_groups.items() if confirmed_dest in v
-                            )
-                            target_id = self.get_room_id(representative)
+                    edge_key = (source_id, target_id, door)
+                    if edge_key not in drawn_edges:
+                        append(
+                            f'  "{source_id}" -> "{target_id}" [label="door {door}" color=black];\n'
+                        )
+                        drawn_edges.add(edge_key)
+
+                elif len(possibilities) > 1:
+                    # Draw multiple possibilities with dashed lines
+                    for possible_dest in possibilities:
+                        target_id = self.get_room_id(
+                            rep_of.get(possible_dest, possible_dest)
+                        )
 
                         edge_key = (source_id, target_id, door)
                         if edge_key not in drawn_edges:
-                            f.write(
-                                f'  "{source_id}" -> "{target_id}" [label="door {door}" color=black];\n'
+                            append(
+                                f'  "{source_id}" -> "{target_id}" [label="door {door}?" style=dashed color=gray];\n'
                             )
                             drawn_edges.add(edge_key)
 
-                    elif len(possibilities) > 1:
-                        # Draw multiple possibilities with dashed lines
-                        for possible_dest in possibilities:
-                            target_id = self.get_room_id(possible_dest)
-                            if possible_dest in merged_rooms:
-                                representative = next(
-                                    k
-                                    for k, v in room_groups.items()
-                                    if possible_dest in v
-                                )
-                                target_id = self.get_room_id(representative)
-
-                            edge_key = (source_id, target_id, door)
-                            if edge_key not in drawn_edges:
-                                f.write(
-                                    f'  "{source_id}" -> "{target_id}" [label="door {door}?" style=dashed color=gray];\n'
-                                )
-                                drawn_edges.add(edge_key)
-
-            f.write("}\n")
+        append("}\n")
+
+        with open(dot_filename, "w") as f:
+            f.write("".join(parts))
 
         if render_png:
             png_filename = dot_filename.replace(".dot", ".png")
@@ -258,10 +351,7 @@ class Problem:
 
     def get_room_id(self, room):
         """Get the room ID for a given room object"""
-        for room_id, r in self.rooms.items():
-            if r is room:
-                return room_id
-        return None
+        return f"{room.room_index}_{room.label}"
 
     def select_problem(self, problem_name):
         """Select a problem using the API"""
@@ -269,11 +359,7 @@ class Problem:
 
         data = {"id": self.user_id, "problemName": problem_name}
 
-        response = requests.post(
-            f"{self.base_url}/select",
-            headers={"Content-Type": "application/json"},
-            json=data,
-        )
+        response = self.session.post(f"{self.base_url}/select", json=data)
 
         print(f"Status: {response.status_code}")
         print(response.text)
@@ -281,17 +367,14 @@ class Problem:
 
     def explore(self, plans):
         """Explore with the given plans using the API"""
-        # Convert plans from arrays of integers to strings for the API
-        plan_strings = ["".join(str(door) for door in plan) for plan in plans]
+        # Convert plans from arrays of integers to strings for the API; the
+        # translate table turns each plan into its digit string in one C call
+        plan_strings = [bytes(plan).translate(_DOOR_TRANS).decode() for plan in plans]
         print(f"Exploring with {len(plans)} plan(s): {', '.join(plan_strings)}")
 
         data = {"id": self.user_id, "plans": plan_strings}
 
-        response = requests.post(
-            f"{self.base_url}/explore",
-            headers={"Content-Type": "application/json"},
-            json=data,
-        )
+        response = self.session.post(f"{self.base_url}/explore", json=data)
 
         print(f"Status: {response.status_code}")
         print(response.text)
@@ -323,22 +406,14 @@ class Problem:
         if depth <= 0:
             return
 
-        paths = []
-
-        # Generate all paths from depth 1 to depth
-        for current_depth in range(1, depth + 1):
-            # Generate all combinations of doors for this depth
-            def generate_paths(current_path, remaining_depth):
-                if remaining_depth == 0:
-                    paths.append(current_path[:])
-                    return
-
-                for door in range(6):  # doors 0-5
-                    current_path.append(door)
-                    generate_paths(current_path, remaining_depth - 1)
-                    current_path.pop()
-
-            generate_paths([], current_depth)
+        # Enumerate every door combination from depth 1 to depth;
+        # itertools.product walks the combinations in C rather than a
+        # recursive Python descent per path
+        paths = [
+            list(combo)
+            for current_depth in range(1, depth + 1)
+            for combo in product(range(6), repeat=current_depth)
+        ]
 
         print(f"Generated {len(paths)} paths up to depth {depth}")
         return self.explore(paths)
@@ -349,11 +424,7 @@ class Problem:
 
         data = {"id": self.user_id, "map": map_data}
 
-        response = requests.post(
-            f"{self.base_url}/guess",
-            headers={"Content-Type": "application/json"},
-            json=data,
-        )
+        response = self.session.post(f"{self.base_url}/guess", json=data)
 
         print(f"Status: {response.status_code}")
         print(response.text)
@@ -374,30 +445,35 @@ class Problem:
         return self.submit_guess(map_data)
 
     def update_room_identities(self):
-        """Update possible identities for all rooms based on current knowledge"""
-        rooms_by_label = {}
-
-        # Group rooms by label
-        for room_id, room in self.rooms.items():
-            if room.label not in rooms_by_label:
-                rooms_by_label[room.label] = []
-            rooms_by_label[room.label].append(room)
-
-        # For each label group, determine possible identities
-        for label, room_list in rooms_by_label.items():
-            for i, room1 in enumerate(room_list):
-                for j, room2 in enumerate(room_list[i + 1 :], i + 1):
-                    # Check if these rooms could be identical
-                    if self.could_be_identical(room1, room2):
-                        room1.possible_identities.add(room2)
-                        room2.possible_identities.add(room1)
-                    else:
-                        # Remove from possible identities if they were there
-                        room1.possible_identities.discard(room2)
-                        room2.possible_identities.discard(room1)
+        """Update possible identities for all rooms based on current knowledge
+
+        Only pairs involving a room whose doors changed since the last pass
+        can flip: could_be_identical only moves true -> false as more doors
+        get confirmed, so clean pairs keep their previous verdict.
+        """
+        dirty = self._dirty_rooms
+        if not dirty:
+            return
+        self._dirty_rooms = set()
+
+        touched = set()
+        for room1 in dirty:
+            bucket = self.rooms_by_label.get(room1.label, ())
+            for room2 in bucket:
+                if room2 is room1:
+                    continue
+                # Check if these rooms could be identical
+                if self.could_be_identical(room1, room2):
+                    room1.possible_identities.add(room2)
+                    room2.possible_identities.add(room1)
+                else:
+                    # Remove from possible identities if they were there
+                    room1.possible_identities.discard(room2)
+                    room2.possible_identities.discard(room1)
+            touched.update(bucket)
 
         # Mark rooms as unique if they have no possible identities
-        for room in self.rooms.values():
+        for room in touched:
             if len(room.possible_identities) == 0:
                 room.confirmed_unique = True
 
@@ -407,25 +483,18 @@ class Problem:
         if room1.label != room2.label:
             return False
 
-        # Check door connections - if they connect to rooms with different labels, they're different
-        for door in range(6):
-            conn1 = room1.get_door_destination(door)
-            conn2 = room2.get_door_destination(door)
-
-            # If one has a confirmed connection and the other doesn't, they could still be identical
-            # (we might not have explored both doors yet)
-            if conn1 is not None and conn2 is not None:
-                # Both have confirmed connections - check if they go to rooms with different labels
-                if conn1.label != conn2.label:
-                    return False
-
-        return True
+        # Doors confirmed on both sides must lead to same-label rooms; the
+        # rooms keep their confirmed destination labels packed two bits per
+        # door, so the six-door comparison is one masked XOR. Doors known
+        # on only one side don't disqualify - the other may be unexplored.
+        wide = _WIDE_MASK[room1.door_known_mask & room2.door_known_mask]
+        return not (room1.door_label_bits ^ room2.door_label_bits) & wide
 
     def find_definite_merges(self):
         """Find rooms that are definitely the same and should be merged"""
         merges = []
 
-        for room_id, room in self.rooms.items():
+        for room in self.rooms:
             if len(room.possible_identities) == 1:
                 other_room = next(iter(room.possible_identities))
                 if len(
@@ -438,12 +507,16 @@ class Problem:
 
     def detect_cycles_and_update(self):
         """Detect cycles in paths longer than num_rooms and update room identities"""
-        for room_id, room in self.rooms.items():
-            for path, rooms_sequence, position in room.paths:
+        for room in self.rooms:
+            for obs_idx, position in room.paths:
+                observation = self.observations[obs_idx]
+                rooms_sequence = observation["rooms"]
                 if len(rooms_sequence) > self.num_rooms:
                     # This path is too long - there must be a cycle
                     # We could implement cycle detection logic here
-                    print(f"Cycle detected in path: {path} -> {rooms_sequence}")
+                    print(
+                        f"Cycle detected in path: {observation['path']} -> {rooms_sequence}"
+                    )
                     # TODO: Implement cycle detection and room merging
     
     def print_state(self, view="summary"):
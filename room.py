@@ -1,8 +1,22 @@
 class Room:
+    # Slotted: exploration creates a candidate room per unseen sequence, so
+    # skip the per-instance __dict__
+    __slots__ = (
+        "room_index",
+        "label",
+        "paths",
+        "door_possibilities",
+        "door_confirmed",
+        "possible_identities",
+        "confirmed_unique",
+        "door_label_bits",
+        "door_known_mask",
+    )
+
     def __init__(self, room_index=None, label=None):
         self.room_index = room_index  # true room "index"
         self.label = label  # which is 0, 1, 2, or 3
-        self.paths = []  # array of paths for how we got here
+        self.paths = []  # (observation index, position) pairs for how we got here
         self.door_possibilities = [
             [] for _ in range(6)
         ]  # door_possibilities[i] = [list of possible Room destinations]
@@ -15,6 +29,8 @@ class Room:
         self.confirmed_unique = (
             False  # True when we know this room is definitely unique
         )
+        self.door_label_bits = 0  # confirmed destination labels, 2 bits per door
+        self.door_known_mask = 0  # bit d set when door d's destination is confirmed
 
     def add_door_possibility(self, door, destination_room):
         """Add a possible destination for a door"""
@@ -26,6 +42,12 @@ class Room:
         self.door_confirmed[door] = destination_room
         # Remove other possibilities since we now know for certain
         self.door_possibilities[door] = [destination_room]
+        # Keep the packed label word in sync for fast identity comparison
+        shift = door * 2
+        self.door_label_bits = (
+            self.door_label_bits & ~(3 << shift) | destination_room.label << shift
+        )
+        self.door_known_mask |= 1 << door
 
     def get_door_destination(self, door):
         """Get the confirmed destination, or None if ambiguous"""
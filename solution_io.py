@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Shared fast load/save helpers for solution.json used by the fix_* scripts"""
+
+import json
+
+try:
+    import orjson  # Optional: much faster C encoder/decoder
+except ImportError:
+    orjson = None
+
+
+def load_solution(filename="solution.json"):
+    """Load a solution document in one byte read"""
+    with open(filename, "rb") as f:
+        raw = f.read()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def save_solution(solution, filename="solution.json"):
+    """Write a solution document back out"""
+    with open(filename, "wb") as f:
+        if orjson is not None:
+            f.write(orjson.dumps(solution, option=orjson.OPT_INDENT_2))
+        else:
+            f.write(json.dumps(solution, indent=2).encode())
+
+
+def load_edges(filename="solution.json"):
+    """Load connections as a flat list of (from_room, from_door, to_room, to_door)
+    int tuples plus the remaining top-level fields, avoiding a second pass over
+    the nested dict tree"""
+    solution = load_solution(filename)
+    edges = [
+        (
+            c["from"]["room"],
+            c["from"]["door"],
+            c["to"]["room"],
+            c["to"]["door"],
+        )
+        for c in solution["connections"]
+    ]
+    meta = {k: v for k, v in solution.items() if k != "connections"}
+    return edges, meta
+
+
+def save_edges(edges, meta, filename="solution.json"):
+    """Inverse of load_edges: rebuild the connection dicts and write out"""
+    solution = dict(meta)
+    solution["connections"] = [
+        {
+            "from": {"room": fr, "door": fd},
+            "to": {"room": tr, "door": td},
+        }
+        for fr, fd, tr, td in edges
+    ]
+    save_solution(solution, filename)
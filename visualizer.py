@@ -22,7 +22,8 @@ class TerminalVisualizer:
         print("ROOM SUMMARY")
         print("=" * 60)
         
-        for room_id, room in sorted(self.problem.rooms.items()):
+        for room in self.problem.rooms:
+            room_id = self.problem.get_room_id(room)
             identity_count = len(room.possible_identities)
             unique_status = "UNIQUE" if room.confirmed_unique else f"{identity_count} possible"
             
@@ -51,14 +52,17 @@ class TerminalVisualizer:
     
     def print_room_details(self, room_id=None):
         """Print detailed view of a specific room or all rooms"""
-        rooms_to_show = [room_id] if room_id else sorted(self.problem.rooms.keys())
-        
-        for rid in rooms_to_show:
-            if rid not in self.problem.rooms:
-                print(f"Room {rid} not found!")
-                continue
-                
-            room = self.problem.rooms[rid]
+        if room_id:
+            rooms_to_show = [room for room in self.problem.rooms
+                             if self.problem.get_room_id(room) == room_id]
+            if not rooms_to_show:
+                print(f"Room {room_id} not found!")
+                return
+        else:
+            rooms_to_show = self.problem.rooms
+
+        for room in rooms_to_show:
+            rid = self.problem.get_room_id(room)
             print("=" * 50)
             print(f"ROOM {room.room_index} (ID: {rid})")
             print("=" * 50)
@@ -74,8 +78,9 @@ class TerminalVisualizer:
                 print(f"  → {', '.join(identity_ids)}")
             
             print(f"\nPaths to this room: {len(room.paths)}")
-            for i, (path, rooms_seq, pos) in enumerate(room.paths[:3]):  # Show first 3
-                print(f"  {i+1}: {path} → {rooms_seq}")
+            for i, (obs_idx, pos) in enumerate(room.paths[:3]):  # Show first 3
+                obs = self.problem.observations[obs_idx]
+                print(f"  {i+1}: {obs['path'][:pos]} → {obs['rooms'][:pos + 1]}")
             if len(room.paths) > 3:
                 print(f"  ... and {len(room.paths) - 3} more")
             
@@ -108,7 +113,7 @@ class TerminalVisualizer:
     
     def print_connection_matrix(self):
         """Print a matrix showing all room-to-room connections"""
-        rooms = list(self.problem.rooms.values())
+        rooms = self.problem.rooms
         if not rooms:
             print("No rooms to display!")
             return
@@ -168,7 +173,7 @@ class TerminalVisualizer:
         door_stats = {i: {'confirmed': 0, 'possible': 0, 'unknown': 0} 
                      for i in range(6)}
         
-        for room in self.problem.rooms.values():
+        for room in self.problem.rooms:
             for door in range(6):
                 dest = room.get_door_destination(door)
                 possibilities = room.get_door_possibilities(door)
@@ -203,8 +208,8 @@ class TerminalVisualizer:
             print("No rooms to display!")
             return
         
-        rooms = list(self.problem.rooms.values())
-        
+        rooms = self.problem.rooms
+
         # Simple grid placement - arrange rooms in a grid
         import math
         grid_size = math.ceil(math.sqrt(len(rooms)))